@@ -8,4 +8,14 @@ import numpy as np
 from arrau.a1d import *
 from arrau.a2d import *
 from arrau.a3d import *
-from plotea import * # for plot-formatting in jupyter notebooks
\ No newline at end of file
+
+# names of plotea (for plot-formatting in jupyter notebooks)
+# imported on first use, not to import matplotlib with arrau
+_plotea_names = ('figax', 'Imshow', 'Shade', 'Wiggle', 'PltPlot', 'Contour', 
+  'Contourf')
+
+def __getattr__(name):
+  if name not in _plotea_names:
+    raise AttributeError("module 'arrau' has no attribute '%s'" % name)
+  from arrau.plot import backend
+  return backend(name)
@@ -4,7 +4,7 @@ from arrau.generic import Arr, ArrAxis
 
 
 class Arr1d(Arr,Arr1dPlot):
-  def _init_slices(self):
+  def _init_slices(self, max_slices=None):
     self.slices = None  
   def _set_axes(self, extent=[None], **kwargs):
     self.axes = kwargs.get('axes', [\
@@ -14,4 +14,8 @@ class Arr1d(Arr,Arr1dPlot):
   def _set_slice_class(self, **kwargs):
     self.SliceClass = None
 class TimeSeries(Arr1d):
-  pass
+  def _set_axes(self, extent=[None], **kwargs):
+    self.axes = kwargs.get('axes', [\
+      ArrAxis(param='t', shape=self.shape[0], unit='s', extent=extent[0])
+    ])
+    return self.axes
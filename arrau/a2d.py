@@ -1,18 +1,15 @@
+import numpy as np
 from arrau.a1d import Arr1d
 from arrau.plot import Arr2dPlot, Arr2dSlicePlot
 from arrau.generic import Arr, ArrAxis, ArrSlices
-from arrau.modify import interlace_arrays
 
 
 class Arr2d(Arr,Arr2dPlot):
   """
   2d array.
   """
-  def interlace(self, other_arr2d, chunk_size=10, **kwargs):
-    arr = Arr2d(interlace_arrays(self.arr, other_arr2d.arr, chunk_size))
-    return arr
-  def _init_slices(self):
-    self.slices = Arr2dSlices()  
+  def _init_slices(self, max_slices=None):
+    self.slices = Arr2dSlices(max_slices)
   def _set_axes(self, extent=[None]*2, **kwargs):
     self.axes = kwargs.get('axes', [\
       ArrAxis(param='x', shape=self.shape[0], unit='m', extent=extent[0]),
@@ -22,13 +19,12 @@ class Arr2d(Arr,Arr2dPlot):
   def _set_slice_class(self, **kwargs):
     self.SliceClass = Arr1d
 class Arr2dSlices(ArrSlices):
-  def _add_slice(self, value, axis, array):
+  def _create_slice(self, value, axis, array):
     SliceClass = {0: Arr2dSliceX, 1: Arr2dSliceY}
-    new_slice = SliceClass[axis](value, axis, array, self)
-    self.list.append(new_slice)  
+    return SliceClass[axis](value, axis, array, self)
   def _init_values(self):
-      xvalues = []
-      yvalues = []
+      xvalues = np.array([])
+      yvalues = np.array([])
       self.values = [xvalues, yvalues]
 class Arr2dSlice(Arr2dSlicePlot):
   def __init__(self, value, axis, arr, all_slices):
@@ -53,15 +49,11 @@ class Arr2dSliceX(Arr2dSlice):
     self.arr.axes[0].label = 'y, m'
   def _set_vertical_axis_up(self):
     self.vertical_axis_up = False  
-  def _pick_slice_values(self):
-    self.vals = self.all_slices.values[1]
 class Arr2dSliceY(Arr2dSlice):
   def _set_axes_labels(self):
     self.arr.axes[0].label = 'x, m'
   def _set_vertical_axis_up(self):
     self.vertical_axis_up = False  
-  def _pick_slice_values(self):
-    self.vvals = self.all_slices.values[0]
 class Surf(Arr2d):
   def _set_axes_labels(self):
     self.axes[0].label = 'x, m'
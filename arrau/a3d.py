@@ -8,8 +8,8 @@ class Arr3d(Arr,Arr3dPlot):
   """
   3d array.
   """
-  def _init_slices(self):
-    self.slices = Arr3dSlices()  
+  def _init_slices(self, max_slices=None):
+    self.slices = Arr3dSlices(max_slices)
   def _set_axes(self, extent=[None]*3, **kwargs):
     self.axes = kwargs.get('axes', [\
       ArrAxis(param='x', shape=self.shape[0], unit='m', extent=extent[0]),
@@ -20,14 +20,13 @@ class Arr3d(Arr,Arr3dPlot):
   def _set_slice_class(self, **kwargs):
     self.SliceClass = Arr2d
 class Arr3dSlices(ArrSlices):
-  def _add_slice(self, value, axis, array):
+  def _create_slice(self, value, axis, array):
     SliceClass = {0: Arr3dSliceX, 1: Arr3dSliceY, 2: Arr3dSliceZ}
-    new_slice = SliceClass[axis](value, axis, array, self)
-    self.list.append(new_slice)    
+    return SliceClass[axis](value, axis, array, self)
   def _init_values(self):
-      xvalues = []
-      yvalues = []
-      zvalues = []
+      xvalues = np.array([])
+      yvalues = np.array([])
+      zvalues = np.array([])
       self.values = [xvalues, yvalues, zvalues]
 class Arr3dSlice(Arr3dSlicePlot):
   def __init__(self, value, axis, arr, all_slices):
@@ -43,30 +42,50 @@ class Arr3dSlice(Arr3dSlicePlot):
     self.arr = arr
     self.axis = axis
     self.value = value
+    self._segments = None
     self._pick_slice_values()
     self._set_axes_labels()
     self._set_axes_order()
     self._set_vertical_axis_up()
+  @property
+  def hvals(self):
+    return self.all_slices.values[self.hvals_axis]
+  @property
+  def vvals(self):
+    return self.all_slices.values[self.vvals_axis]
   # -----------------------------------------------------------------------------    
   def _get_slice_lines(self, is_vertical):
-    if is_vertical:
-      axis = self.vaxis
-      vals = self.vvals
-    else:
-      axis = self.haxis
-      vals = self.hvals
+    segments = self._get_slice_segments()
+    nv = len(self.vvals)
+    segments = segments[:nv] if is_vertical else segments[nv:]
+    return [Arr3dSliceLine(s[:, 0], s[:, 1]) for s in segments]
+  def _get_slice_segments(self):
+    """
+    Get end points of lines marking 
+    the other slices on this slice.
 
-    v1, v2 = self.arr.axes[axis].extent
-    n = self.arr.shape[axis]
+    Returns
+    -------
+    array
+        Of shape (number of lines, 2, 2), i.e.
+        [[[x1, y1], [x2, y2]], ...], vertical lines
+        first, then horizontal ones.
     
-    lines = []
-    for v in vals:
-      abscissas = np.linspace(v1, v2, n)
-      ordinates = np.full(n, v)
-      if is_vertical: # swap
-        abscissas, ordinates = ordinates, abscissas
-      lines.append(Arr3dSliceLine(abscissas, ordinates))
-    return lines
+    Notes
+    -----
+    Cached until values of all_slices change.
+    """
+    version = self.all_slices.version
+    if self._segments is None or self._segments[0] != version:
+      vvals, hvals = self.vvals, self.hvals
+      segments = np.empty((len(vvals) + len(hvals), 2, 2))
+      # vertical lines span the vertical axis, and vice versa
+      segments[:len(vvals), :, 0] = np.asarray(vvals)[:, None]
+      segments[:len(vvals), :, 1] = self.arr.axes[self.vaxis].extent
+      segments[len(vvals):, :, 0] = self.arr.axes[self.haxis].extent
+      segments[len(vvals):, :, 1] = np.asarray(hvals)[:, None]
+      self._segments = (version, segments)
+    return self._segments[1]
   def _set_axes_order(self):
     self.haxis = 0 
     self.vaxis = 1
@@ -80,8 +99,8 @@ class Arr3dSliceX(Arr3dSlice):
   def _set_vertical_axis_up(self):
     self.vertical_axis_up = False  
   def _pick_slice_values(self):
-    self.vvals = self.all_slices.values[1]
-    self.hvals = self.all_slices.values[2]
+    self.vvals_axis = 1
+    self.hvals_axis = 2
 class Arr3dSliceY(Arr3dSlice):
   """
   XZ
@@ -92,8 +111,8 @@ class Arr3dSliceY(Arr3dSlice):
   def _set_vertical_axis_up(self):
     self.vertical_axis_up = False  
   def _pick_slice_values(self):
-    self.vvals = self.all_slices.values[0]
-    self.hvals = self.all_slices.values[2]
+    self.vvals_axis = 0
+    self.hvals_axis = 2
 class Arr3dSliceZ(Arr3dSlice):
   """
   XY plane
@@ -104,8 +123,8 @@ class Arr3dSliceZ(Arr3dSlice):
   def _set_vertical_axis_up(self):
     self.vertical_axis_up = True
   def _pick_slice_values(self):
-    self.vvals = self.all_slices.values[0]
-    self.hvals = self.all_slices.values[1]
+    self.vvals_axis = 0
+    self.hvals_axis = 1
 class Arr3dSliceLine:
   def __init__(self, abscissas, ordinates):
     self.abscissas = abscissas
@@ -0,0 +1,307 @@
+"""
+Chunked, compressed on-disk arrays.
+
+The array is split into regular chunks
+(by default ~1 MB cubes) compressed separately,
+so that reading a slice along any axis
+decompresses only the chunks it touches.
+
+A store is either a directory (.chk) with
+a meta.json file and a file per chunk,
+or a single zip file (.chkz) with the same
+members, e.g. model.chk/meta.json, model.chk/0.0.1.
+"""
+import json
+import os
+import zipfile
+import zlib
+from itertools import product
+import numpy as np
+from arrau.generic import LRUCache
+from arrau.io import axes2meta, meta2axes
+
+META_FNAME = 'meta.json'
+
+def read_chunked(fname, cache_size=64, **kwargs):
+  """
+  Open a chunked store.
+
+  Parameters
+  ----------
+  fname : str
+      Directory or zip file, see save_chunked.
+  cache_size : int, optional
+      Max. number of decompressed chunks
+      kept in memory, by default 64.
+
+  Returns
+  -------
+  ChunkedArray
+  """
+  return ChunkedArray(fname, cache_size=cache_size)
+def save_chunked(A, fname, chunks=None, compressor='zlib', level=1, axes=None,
+  extent=None, **kwargs):
+  """
+  Save an array as a chunked store.
+
+  Parameters
+  ----------
+  A : array / Arr
+      Array to save (can be a np.memmap or a lazy
+      array-like). Axes of Arr are saved too.
+  fname : str
+      Output directory, or a single zip file
+      if fname ends with .chkz or .zip.
+  chunks : tuple, optional
+      Chunk shape, by default see default_chunks.
+  compressor : str, optional
+      'zlib' (default), 'lz4' (requires the lz4
+      package) or None.
+  level : int, optional
+      Compression level, by default 1 (fast).
+  axes : list, optional
+      List of ArrAxis.
+  extent : list, optional
+      [[x1, x2], ...] used if no axes are provided.
+
+  Notes
+  -----
+  Data is read slab by slab along the first axis,
+  each slab being one chunk thick.
+  """
+  if hasattr(A, 'axes'):
+    axes = A.axes if axes is None else axes
+    A = A.arr
+  if not hasattr(A, 'shape'):
+    A = np.asanyarray(A)
+  dtype = np.dtype(A.dtype)
+  chunks = default_chunks(A.shape, dtype) if chunks is None else tuple(chunks)
+  assert len(chunks) == len(A.shape)
+  compress, _ = get_codec(compressor)
+  meta = {
+    'shape': list(A.shape),
+    'dtype': dtype.str,
+    'chunks': list(chunks),
+    'compressor': compressor,
+    'level': level,
+    'fill_value': 0,
+    'axes': axes2meta(axes, extent),
+  }
+  with _Store(fname, 'w') as store:
+    nchunks = [int(np.ceil(n / c)) for n, c in zip(A.shape, chunks)]
+    for i in range(nchunks[0]):
+      slab = np.asarray(A[i * chunks[0] : (i + 1) * chunks[0]])
+      for cid in product(*[range(n) for n in nchunks[1:]]):
+        region = tuple(slice(j * c, (j + 1) * c) for j, c in zip(cid, chunks[1:]))
+        chunk = np.ascontiguousarray(slab[(slice(None),) + region])
+        store.write(_chunk_name((i,) + cid), compress(chunk.tobytes(), level))
+    store.write(META_FNAME, json.dumps(meta, indent=2).encode())
+def default_chunks(shape, dtype, nbytes=2**20):
+  """
+  Chunk shape of about nbytes, as close
+  to a cube as the array shape allows,
+  so that slices along all axes cost the same.
+  """
+  ndim = len(shape)
+  size = max(1, nbytes // np.dtype(dtype).itemsize)
+  chunks = [1] * ndim
+  # axes shorter than the cube edge are not split
+  todo = sorted(range(ndim), key=lambda i: shape[i])
+  while todo:
+    edge = int(round((size / np.prod(chunks)) ** (1. / len(todo))))
+    i = todo.pop(0)
+    chunks[i] = max(1, min(shape[i], edge))
+  return tuple(chunks)
+def get_codec(compressor):
+  """
+  Get compress(data, level) and decompress(data)
+  functions of a compressor.
+  """
+  if compressor is None:
+    return (lambda data, level: data), (lambda data: data)
+  elif compressor == 'zlib':
+    return zlib.compress, zlib.decompress
+  elif compressor == 'lz4':
+    try:
+      import lz4.frame
+    except ImportError:
+      raise ImportError('lz4 compressor requires the lz4 package: pip install lz4')
+    return (lambda data, level: lz4.frame.compress(data, compression_level=level)), \
+      lz4.frame.decompress
+  else:
+    raise ValueError('Unknown compressor: %s' % compressor)
+class ChunkedArray:
+  """
+  Read-only array-like backed by a chunked store
+  (see save_chunked).
+
+  Basic indexing (integers, slices, ellipsis) and
+  take along an axis decompress only the chunks
+  touched, keeping up to cache_size of them in an
+  LRU cache. np.asarray reads the whole array.
+  """
+  def __init__(self, fname, cache_size=64):
+    self.fname = fname
+    self.store = _Store(fname, 'r')
+    self.meta = json.loads(self.store.read(META_FNAME).decode())
+    self.shape = tuple(self.meta['shape'])
+    self.dtype = np.dtype(self.meta['dtype'])
+    self.chunks = tuple(self.meta['chunks'])
+    self.fill_value = self.meta['fill_value']
+    # decompressed chunks keyed by chunk indices, e.g. (0, 2, 1)
+    self.cache = LRUCache(cache_size)
+    _, self._decompress = get_codec(self.meta['compressor'])
+  def __array__(self, dtype=None, copy=None):
+    A = self[...]
+    return A if dtype is None else A.astype(dtype)
+  def __getitem__(self, key):
+    indices, squeeze = self._get_indices(key)
+    A = self._read(indices)
+    return A[tuple(0 if s else slice(None) for s in squeeze)]
+  def __len__(self):
+    return self.shape[0]
+  @property
+  def axes(self):
+    """
+    List of ArrAxis or None if they were not saved.
+    """
+    return meta2axes(self.meta)
+  @property
+  def ndim(self):
+    return len(self.shape)
+  @property
+  def size(self):
+    return int(np.prod(self.shape))
+  def close(self):
+    self.store.close()
+  def take(self, indices, axis=None, **kwargs):
+    """
+    Same as np.take, also called by it.
+    """
+    if axis is None:
+      return np.asarray(self).take(indices, **kwargs)
+    axis = axis % self.ndim
+    key = [slice(None)] * self.ndim
+    key[axis] = indices
+    indices, _ = self._get_indices(tuple(key))
+    return self._read(indices)
+  # -----------------------------------------------------------------------------
+  def _get_chunk(self, cid):
+    chunk = self.cache.get(cid)
+    if chunk is None:
+      shape = tuple(min(c, n - i * c) for i, c, n in zip(cid, self.chunks, self.shape))
+      data = self.store.read(_chunk_name(cid), None)
+      if data is None:
+        chunk = np.full(shape, self.fill_value, self.dtype)
+      else:
+        chunk = np.frombuffer(self._decompress(data), self.dtype).reshape(shape)
+      self.cache.put(cid, chunk)
+    return chunk
+  def _get_indices(self, key):
+    """
+    Convert the key to an array of
+    indices along each axis.
+
+    Returns
+    -------
+    indices : list
+        Array of indices per axis.
+    squeeze : list
+        Whether the axis is to be dropped
+        (indexed by integer).
+    """
+    key = key if isinstance(key, tuple) else (key,)
+    if any(k is Ellipsis for k in key):
+      i = [k is Ellipsis for k in key].index(True)
+      key = key[:i] + (slice(None),) * (self.ndim - len(key) + 1) + key[i+1:]
+    key = key + (slice(None),) * (self.ndim - len(key))
+    if len(key) > self.ndim:
+      raise IndexError('Too many indices for array of shape %s' % str(self.shape))
+    indices = []
+    squeeze = []
+    for k, n in zip(key, self.shape):
+      if isinstance(k, slice):
+        inds = np.arange(*k.indices(n))
+      else:
+        inds = np.asarray(k)
+        if inds.ndim > 1 or inds.dtype.kind not in 'iu':
+          raise IndexError('Only integers, slices and 1d integer arrays are supported')
+        if np.any((inds < -n) | (inds >= n)):
+          raise IndexError('Index out of bounds for axis of size %s' % n)
+        inds = inds % n
+      squeeze.append(inds.ndim == 0)
+      indices.append(np.atleast_1d(inds))
+    return indices, squeeze
+  def _read(self, indices):
+    """
+    Read the array at the outer product of indices,
+    chunk by chunk.
+    """
+    A = np.empty([len(i) for i in indices], self.dtype)
+    if A.size == 0:
+      return A
+    cids = [i // c for i, c in zip(indices, self.chunks)]
+    for cid in product(*[np.unique(c) for c in cids]):
+      chunk = self._get_chunk(tuple(int(i) for i in cid))
+      out, local = [], []
+      for i, c, ids, j in zip(indices, self.chunks, cids, cid):
+        mask = ids == j
+        out.append(_as_slice(np.flatnonzero(mask)))
+        local.append(_as_slice(i[mask] - j * c))
+      if all(isinstance(s, slice) for s in out + local):
+        A[tuple(out)] = chunk[tuple(local)]
+      else:
+        A[np.ix_(*[_as_array(s) for s in out])] = \
+          chunk[np.ix_(*[_as_array(s) for s in local])]
+    return A
+class _Store:
+  """
+  Members of a chunked store: files
+  in a directory or in a zip file.
+  """
+  def __init__(self, fname, mode='r'):
+    self.fname = fname
+    self.mode = mode
+    self.zip = os.path.splitext(fname)[1].lower() in ['.chkz', '.zip']
+    if self.zip:
+      self.file = zipfile.ZipFile(fname, mode, compression=zipfile.ZIP_STORED)
+    elif mode == 'w':
+      os.makedirs(fname, exist_ok=True)
+  def __enter__(self):
+    return self
+  def __exit__(self, *args):
+    self.close()
+  def close(self):
+    if self.zip:
+      self.file.close()
+  def read(self, name, default=Ellipsis):
+    try:
+      if self.zip:
+        return self.file.read(name)
+      with open(os.path.join(self.fname, name), 'rb') as f:
+        return f.read()
+    except (KeyError, FileNotFoundError):
+      if default is Ellipsis:
+        raise
+      return default
+  def write(self, name, data):
+    if self.zip:
+      self.file.writestr(name, data)
+    else:
+      with open(os.path.join(self.fname, name), 'wb') as f:
+        f.write(data)
+def _as_array(s):
+  return np.arange(s.start, s.stop, s.step) if isinstance(s, slice) else s
+def _as_slice(inds):
+  """
+  Convert increasing, evenly spaced indices to a slice
+  (basic indexing is much faster than np.ix_).
+  """
+  if len(inds) == 1:
+    return slice(int(inds[0]), int(inds[0]) + 1)
+  step = inds[1] - inds[0]
+  if step > 0 and np.all(np.diff(inds) == step):
+    return slice(int(inds[0]), int(inds[-1]) + 1, int(step))
+  return inds
+def _chunk_name(cid):
+  return '.'.join(str(i) for i in cid)
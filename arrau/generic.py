@@ -3,8 +3,10 @@ Dimension-independent abstract arrays
 and auxiliary objects.
 """
 from abc import ABC, abstractmethod
+from collections import OrderedDict
+from tempfile import TemporaryFile
 import numpy as np
-from arrau.modify import modify_array
+from arrau.modify import interlace_arrays, modify_array
 
 class Arr(ABC):
   """
@@ -21,15 +23,33 @@ class Arr(ABC):
         List of ArrAxis elements.
     extent : list
         List of pairs [vmin, vmax], by default None.
+    slice_cache_size : int
+        Max. number of slices cached by self.slice, 
+        by default 32.
+    max_slices : int
+        Max. number of slices kept in self.slices,
+        by default None (no limit), see ArrSlices.
     """
     self.shape = array.shape
     self.nd = len(self.shape)
     self.axes = self._set_axes(**kwargs)
     self._set_axes_labels()
+    self.slice_cache = ArrSliceCache(kwargs.get('slice_cache_size', 32))
     self.arr = array
     self._set_slice_class()
-    self._init_slices()
-  def extract(self, extent):
+    self._init_slices(kwargs.get('max_slices', None))
+  @property
+  def arr(self):
+    return self._arr
+  @arr.setter
+  def arr(self, array):
+    """
+    Set the data. Anything cached for
+    the previous data is discarded.
+    """
+    self._arr = array
+    self._clear_caches()
+  def extract(self, extent, copy=False):
     """
     Extract a subarray from the array.
 
@@ -37,31 +57,133 @@ class Arr(ABC):
     ----------
     extent : list
         [[x1, x2], ...] in metres.
+    copy : bool, optional
+        If True, copy the data of the subarray,
+        by default False, i.e. the subarray is a
+        view of self.arr (still memory-mapped
+        if self.arr is a np.memmap). If self.arr is 
+        a ChunkedArray, only the chunks overlapping
+        the extent are read.
+    
+    Returns
+    -------
+    Arr
+        Subarray of the same class.
     """
-    array = self.arr
-    indices = []
+    slices = []
     for axis, (m1, m2) in enumerate(extent):
       assert m1 >= self.axes[axis].extent[0]
       assert m2 <= self.axes[axis].extent[1]
       i1 = self._get_slice_index(m1, 'm', axis)
       i2 = self._get_slice_index(m2, 'm', axis)
-      indices.append([i1, i2])
-    # print('indices', indices)
-    for axis, (i1,i2) in enumerate(indices):
-      array = np.take(array, np.arange(i1, i2+1), axis=axis)
+      slices.append(slice(i1, i2+1))
+    # basic slicing returns a view, unlike np.take
+    array = self.arr[tuple(slices)]
+    if copy:
+      array = np.array(array)
     return self.__class__(array, extent=extent) 
   def info(self):
     """
     Print some useful info about the erray.
     """
+    stats = self.stats()
     print('grid shape: {} [nodes]'.format(self.shape))
-    print('grid cell-size (dx): {} [m]'.format(self.dx))    
-    print('grid extent: {} [m]'.format(self.extent))
-    print('value min: {}, max: {}'.format(np.min(self.arr), np.max(self.arr)))
+    print('grid cell-size (dx): {} [m]'.format([ax.dx for ax in self.axes]))    
+    print('grid extent: {} [m]'.format([list(ax.extent) for ax in self.axes]))
+    print('value min: {}, max: {}'.format(stats.min, stats.max))
+    print('value mean: {}, std: {}'.format(stats.mean, stats.std))
+  def interlace(self, other, chunk_size=10, axis=0, out=None, **kwargs):
+    """
+    Interlace chunks of traces of this 
+    and other array(s).
+
+    Parameters
+    ----------
+    other : Arr / list
+        Array(s) of the same shape.
+    chunk_size : int, optional
+        See interlace_arrays.
+    axis : int, optional
+        See interlace_arrays.
+    out : array, optional
+        See interlace_arrays.
+
+    Returns
+    -------
+    Arr
+        Interlaced array of the same class and extent.
+    """
+    others = other if isinstance(other, (list, tuple)) else [other]
+    arrays = [self.arr] + [o.arr for o in others]
+    array = interlace_arrays(*arrays, chunk_size=chunk_size, axis=axis, out=out)
+    return self.__class__(array, extent=[ax.extent for ax in self.axes])
   def modify(self, **kwargs):
+    """
+    Modify the array, see modify_array.
+
+    Notes
+    -----
+    If self.arr is a np.memmap, it is processed 
+    in chunks of chunk_size traces (by default 2**14)
+    and the result is memory-mapped too: to `out`
+    if provided, otherwise to a temporary file.
+    Array modifiers need the whole array, so with 
+    them it is processed in memory (unless chunk_size
+    is set, which raises an error).
+    """
+    chunkable = 'chunk_size' in kwargs or not kwargs.get('array_modifiers', None)
+    if isinstance(self.arr, np.memmap) and chunkable:
+      kwargs['chunk_size'] = kwargs.get('chunk_size', 2**14)
+      if kwargs.get('out', None) is None:
+        kwargs['out'] = TemporaryFile()
     self.arr = modify_array(self.arr, **kwargs)
-  def normalise(self, norm='max'):
-    self.arr = modify_array(self.arr, norm=norm)  
+  def normalise(self, norm='max', **kwargs):
+    self.modify(norm=norm, **kwargs)
+  @classmethod
+  def open(cls, fname, **kwargs):
+    """
+    Open an array stored in a file 
+    without reading it into memory.
+
+    Parameters
+    ----------
+    fname : str
+        File of any format supported by
+        FileReader.read_any. It is cached as a
+        memory-mapped .mmp file (unless it is one,
+        or a chunked store, see arrau.chunked).
+    **kwargs
+        Passed to FileReader.read_any and the 
+        constructor, e.g. extent (overriding that
+        stored in the metadata), or shape of a legacy 
+        .mmp file.
+
+    Returns
+    -------
+    Arr
+        Arr1d, Arr2d or Arr3d depending on the number
+        of dimensions (if called on Arr), or cls.
+        Its data is a np.memmap (or a ChunkedArray).
+    """
+    from arrau.a1d import Arr1d
+    from arrau.a2d import Arr2d
+    from arrau.a3d import Arr3d
+    from arrau.io import FileReader
+    array = FileReader.read_any(fname, **kwargs)
+    if cls is Arr:
+      cls = {1: Arr1d, 2: Arr2d, 3: Arr3d}[array.ndim]
+    if 'axes' in kwargs:
+      return cls(array, **kwargs)
+    axes = getattr(array, 'axes', None)
+    if axes is None:
+      axes = FileReader.read_any_axes(fname, **kwargs)
+    if axes is not None:
+      if kwargs.get('extent', None) is not None:
+        # explicit extent overrides the stored one, params and units are kept
+        for ax, extent in zip(axes, kwargs['extent']):
+          ax.set_extent(extent)
+      kwargs['axes'] = axes
+    return cls(array, **kwargs)
   def read(self, overwrite=True, **kwargs):
     """
   
@@ -85,6 +207,27 @@ class Arr(ABC):
     
     # return self.array 
     pass 
+  def stats(self, bins=1024):
+    """
+    Statistics of the array values, see ArrStats.
+
+    They are computed in one pass over the data
+    and cached until the data changes (i.e. self.arr
+    is set, e.g. by self.modify).
+
+    Parameters
+    ----------
+    bins : int, optional
+        Number of histogram bins, by default 1024.
+
+    Returns
+    -------
+    ArrStats
+    """
+    key = ('stats', bins)
+    if key not in self.data_cache:
+      self.data_cache[key] = ArrStats(self.arr, bins=bins)
+    return self.data_cache[key]
   def slice(self, value, unit='index', axis=0, **kwargs):
     """
     Slice the array at a single value
@@ -119,11 +262,66 @@ class Arr(ABC):
     # add the slice to the list
     self.slices.add(value, axis, array)
     return array
+  def slices_at(self, values, unit='index', axis=0):
+    """
+    Slice the array at multiple values
+    along a given axis at once.
+
+    Parameters
+    ----------
+    values : array
+        Values of coordinate to slice at, see Arr.slice.
+    unit : str, optional
+        See Arr.slice.
+    axis : int, optional
+        See Arr.slice.
+
+    Returns
+    -------
+    stack : Arr
+        Array of the same class, with slices 
+        stacked along the first axis. If they are 
+        evenly spaced and sorted, its extent along 
+        the first axis spans the first and the last
+        slice, otherwise the first axis is an index 
+        axis ('slice'). Coordinates of the slices are
+        stored as stack.values anyway.
+    slices : list
+        Slices of type defined by _set_slice_class(),
+        they are views of the stack. 
+
+    Notes
+    -----
+    All slices are gathered with a single np.take,
+    i.e. a single pass through a memory-mapped array. 
+    Unlike Arr.slice, slices are not added to self.slices.
+    """
+    ct = CoordTransform()
+    indices = np.atleast_1d(self._get_slice_index(values, unit, axis))
+    self._check_slice_index(indices, axis)
+    array = np.moveaxis(np.take(self.arr, indices, axis=axis), axis, 0)
+    ax = self.axes[axis]
+    coords = ct.index2metre(indices, ax.extent[0], ax.dx) if ax.dx is not None \
+      else np.full(len(indices), ax.extent[0])
+    steps = np.diff(indices)
+    if len(steps) == 0 or (steps[0] > 0 and np.all(steps == steps[0])):
+      stack_axis = ArrAxis(ax.param, len(indices), unit=ax.unit, 
+        extent=[coords[0], coords[-1]])
+    else:
+      stack_axis = ArrAxis('slice', len(indices), unit='index')
+    axes = self._slice_axes(axis)
+    stack = self.__class__(array, axes=[stack_axis] + axes)
+    stack.values = coords
+    slices = [self.SliceClass(a, axes=axes) for a in array]
+    return stack, slices
   # -----------------------------------------------------------------------------
+  def _clear_caches(self):
+    self.slice_cache.clear()
+    # anything else derived from the data, e.g. plotting pyramids
+    self.data_cache = {}
   def _check_slice_index(self, index, axis):
-    if (index < 0) or (index >= self.shape[axis]):
-      raise IndexError('Incorrect array index: %s' % index)
-  def _get_slice_index(self, value, unit, axis):
+    CoordTransform().check_index(index, self.shape[axis])
+  def _get_slice_index(self, value, unit, axis, rounding='nearest'):
     """
     Calculate array index to slice at
     based on the provided coordinate
@@ -131,28 +329,34 @@ class Arr(ABC):
 
     Parameters
     ----------
-    See slice().
+    See slice(). Value can also be an array.
+    rounding : str, optional
+        See CoordTransform.metre2index.
 
     Returns
     -------
-    int
-        Index at which the array
+    int / array
+        Index (indices) at which the array
         will be sliced.
     """
     ax = self.axes[axis]
+    ct = CoordTransform()
     if unit == 'index' or unit == 'i':
       index = value
     elif unit == 'node' or unit == 'n':
-      index = CoordTransform().node2index(value)
+      index = ct.node2index(value)
     elif unit == 'metre' or unit == 'm':
       origin = ax.extent[0]
       dx = ax.dx
-      index = CoordTransform().metre2index(value, origin, dx)
+      index = ct.metre2index(value, origin, dx, rounding=rounding)
     elif unit == 'kilometre' or unit == 'km':
       origin = ax.extent[0]
       dx = ax.dx
-      # use metre2index as nothing changes (origin and dx are in km)
-      index = CoordTransform().metre2index(value, origin, dx)    
+      if ax.unit == 'km':
+        # nothing changes (origin and dx are in km)
+        index = ct.metre2index(value, origin, dx, rounding=rounding)
+      else:
+        index = ct.kilometre2index(value, origin, dx, rounding=rounding)
     else:
       raise ValueError('Unknown unit: %s.' % unit)    
     return index      
@@ -174,9 +378,24 @@ class Arr(ABC):
     Returns
     -------
     arrauay
-        Sliced array.
-    """
-    return np.take(self.arr, indices=index, axis=axis)
+        Sliced array. It is a strided view of self.arr,
+        unless self.arr is a np.memmap. In that case
+        the slice is read into memory, so that repeated 
+        calls don't read it from disk again. If self.arr
+        is a ChunkedArray, only the chunks touched are read.
+    
+    Notes
+    -----
+    Slices are cached in self.slice_cache.
+    """
+    key = (axis, int(index))
+    array = self.slice_cache.get(key)
+    if array is None:
+      array = self.arr[(slice(None),) * axis + (int(index),)]
+      if isinstance(array, np.memmap):
+        array = np.array(array)
+      self.slice_cache.put(key, array)
+    return array
   def _slice_axes(self, axis):
     """
     Slice array axes.
@@ -196,7 +415,7 @@ class Arr(ABC):
     return axes
   # -----------------------------------------------------------------------------
   @abstractmethod
-  def _init_slices(self):
+  def _init_slices(self, max_slices=None):
     pass
   @abstractmethod
   def _set_axes(self, **kwargs):
@@ -310,14 +529,108 @@ class ArrAxis:
     dx = (x2 - x1) / (nx-1) if nx > 1 else None
     self.dx = dx
     return self.dx
+class LRUCache:
+  """
+  Bounded LRU cache of arrays keyed 
+  by any hashable, e.g. (axis, index).
+  """
+  item_name = 'items'
+  def __init__(self, maxsize=32):
+    """
+    Parameters
+    ----------
+    maxsize : int, optional
+        Max. number of items kept, by default 32.
+        If 0, nothing is cached. The least recently
+        used item is discarded first.
+    """
+    self.maxsize = maxsize
+    self.hits = 0
+    self.misses = 0
+    self._data = OrderedDict()
+  def __contains__(self, key):
+    return key in self._data
+  def __len__(self):
+    return len(self._data)
+  def clear(self):
+    self._data.clear()
+  def get(self, key):
+    """
+    Get a cached item.
+
+    Parameters
+    ----------
+    key : hashable
+
+    Returns
+    -------
+    arrauay
+        Cached item or None if it is not cached.
+    """
+    if key not in self._data:
+      self.misses += 1
+      return None
+    self.hits += 1
+    self._data.move_to_end(key)
+    return self._data[key]
+  def info(self):
+    print('cached {}: {}/{}'.format(self.item_name, len(self), self.maxsize))
+    print('hits: {}, misses: {}'.format(self.hits, self.misses))
+  def put(self, key, array):
+    """
+    Cache an item.
+
+    Parameters
+    ----------
+    key : hashable
+    array : arrauay
+    """
+    if self.maxsize <= 0:
+      return
+    self._data[key] = array
+    self._data.move_to_end(key)
+    while len(self._data) > self.maxsize:
+      self._data.popitem(last=False)
+class ArrSliceCache(LRUCache):
+  """
+  LRU cache of array slices
+  keyed by (axis, index).
+  """
+  item_name = 'slices'
 class ArrSlices(ABC):
-  def __init__(self):
-    if hasattr(self, 'list'):
-      # self.__log.debug('Already has "list" attribute.')
-      pass
-    else:
-      self.list = []
-      self._init_values()
+  """
+  Slices of an array, each identified
+  by (axis, value) pair.
+  """
+  def __init__(self, max_slices=None):
+    """
+    Parameters
+    ----------
+    max_slices : int, optional
+        Max. number of slices kept, by default None
+        (no limit). If exceeded, the least recently 
+        added slice is discarded.
+    
+    Notes
+    -----
+    self.version is incremented whenever
+    self.values change, so that anything derived
+    from them (e.g. slice lines) can be cached.
+    """
+    self.max_slices = max_slices
+    self.version = 0
+    self._slices = OrderedDict()
+    self._init_values()
+  def __contains__(self, key):
+    return key in self._slices
+  def __len__(self):
+    return len(self._slices)
+  @property
+  def list(self):
+    """
+    Slices in the order they were (re-)added. 
+    """
+    return list(self._slices.values())
   def add(self, value, axis, array):
     """
     Add a slice to array-slices.
@@ -328,107 +641,367 @@ class ArrSlices(ABC):
     axis : See Arr.slice
     array : See Arr.slice
         Array returned by Arr.slice.
+    
+    Notes
+    -----
+    Adding a slice which is already there 
+    only makes it the most recent one.
     """
-    # check
-    if self._on_the_list(value, axis):
-      # self.__log.debug('This slice is already on the list.')
+    key = (axis, value)
+    if key in self._slices:
+      self._slices.move_to_end(key)
       return
-    # add
-    self._add_slice(value, axis, array)
+    self._slices[key] = self._create_slice(value, axis, array)
     self._add_slice_value(value, axis)
+    self._evict()
+  def get(self, value, axis):
+    """
+    Get a slice.
+
+    Returns
+    -------
+    slice
+        Slice or None if it is not on the list.
+    """
+    return self._slices.get((axis, value), None)
+  def nearest(self, value, axis):
+    """
+    Find the slice nearest to a given value.
+
+    Parameters
+    ----------
+    value : float
+        Coordinate along axis.
+    axis : int
+        Axis of slicing.
+
+    Returns
+    -------
+    slice
+        Nearest slice along axis or None
+        if there is no slice along it.
+    """
+    vals = self.values[axis]
+    if len(vals) == 0:
+      return None
+    i = np.searchsorted(vals, value)
+    if i == len(vals) or (i > 0 and value - vals[i-1] <= vals[i] - value):
+      i -= 1
+    return self.get(vals[i], axis)
   def plot(self, slice_no, **kwargs):
     self.list[slice_no].plot(**kwargs)
   # -----------------------------------------------------------------------------
   def _add_slice_value(self, value, axis):
-    self.values[axis].append(value)     
-  def _on_the_list(self, value, axis):
-    is_in = False
-    for sli in self.list:
-      if sli.value == value and sli.axis == axis:
-        is_in = True
-        break
-    return is_in
+    vals = self.values[axis]
+    self.values[axis] = np.insert(vals, np.searchsorted(vals, value), value)
+    self.version += 1
+  def _evict(self):
+    if self.max_slices is None:
+      return
+    while len(self._slices) > self.max_slices:
+      (axis, value), _ = self._slices.popitem(last=False)
+      self._remove_slice_value(value, axis)
+  def _remove_slice_value(self, value, axis):
+    vals = self.values[axis]
+    self.values[axis] = np.delete(vals, np.searchsorted(vals, value))
+    self.version += 1
   # -----------------------------------------------------------------------------  
   @abstractmethod
-  def _add_slice(self, value, axis, array):
+  def _create_slice(self, value, axis, array):
     pass  
   @abstractmethod
   def _init_values(self):
     pass    
 
+class ArrStats:
+  """
+  Statistics of array values (NaNs and infs ignored):
+  count, min, max, mean, std, histogram and 
+  approximate percentiles, computed in one pass
+  over blocks along the first axis, so the array 
+  can be a np.memmap bigger than memory.
+  """
+  def __init__(self, A, bins=1024, block_size=2**22):
+    """
+    Parameters
+    ----------
+    A : array
+        Array of any shape.
+    bins : int, optional
+        Number of histogram bins, by default 1024.
+        Percentiles are accurate to about 
+        (max - min) / bins.
+    block_size : int, optional
+        Approx. number of elements read at once, 
+        by default 2**22.
+    """
+    self.count = 0
+    self.min = np.nan
+    self.max = np.nan
+    self.mean = np.nan
+    self.std = np.nan
+    # even, to merge bins in pairs when widening the range
+    self.hist = np.zeros(bins + bins % 2, dtype=np.int64)
+    self.bin_edges = None
+    self._m2 = 0.
+    A = A if np.ndim(A) > 0 else np.reshape(A, 1)
+    step = max(1, block_size // max(1, int(np.prod(A.shape[1:]))))
+    for i in range(0, len(A), step):
+      self._update(np.asarray(A[i : i + step]))
+    if self.count > 0:
+      self.std = np.sqrt(self._m2 / self.count)
+  def clim(self, percentile=None, symmetric=False):
+    """
+    Colour limits.
+
+    Parameters
+    ----------
+    percentile : float, optional
+        E.g. 99 clips values below the 1st 
+        and above the 99th percentile. By default
+        None, i.e. min and max.
+    symmetric : bool, optional
+        Make the limits symmetric around 0, 
+        by default False.
+
+    Returns
+    -------
+    vmin, vmax : float
+    """
+    if percentile is None:
+      vmin, vmax = self.min, self.max
+    else:
+      vmin, vmax = self.percentile([100 - percentile, percentile])
+    if symmetric:
+      vmax = max(abs(vmin), abs(vmax))
+      vmin = -vmax
+    return vmin, vmax
+  def percentile(self, q):
+    """
+    Approximate percentile(s) interpolated 
+    from the histogram, see np.percentile.
+    """
+    q = np.asarray(q, dtype=float)
+    if self.count == 0:
+      return np.full(q.shape, np.nan)[()]
+    cdf = np.concatenate([[0], np.cumsum(self.hist)]) / self.count
+    p = np.interp(q / 100., cdf, self.bin_edges)
+    return np.clip(p, self.min, self.max)[()]
+  # -----------------------------------------------------------------------------
+  def _rebin(self, vmin, vmax):
+    """
+    Widen the histogram range to cover [vmin, vmax]
+    by doubling its width, merging pairs of bins.
+    """
+    lo, hi = self.bin_edges[0], self.bin_edges[-1]
+    bins = len(self.hist)
+    while vmin < lo or vmax > hi:
+      width = hi - lo
+      pairs = self.hist.reshape(-1, 2).sum(axis=1)
+      if vmin < lo: # extend downwards
+        self.hist = np.concatenate([np.zeros(bins // 2, np.int64), pairs])
+        lo = lo - width
+      else:
+        self.hist = np.concatenate([pairs, np.zeros(bins // 2, np.int64)])
+        hi = hi + width
+    self.bin_edges = np.linspace(lo, hi, bins + 1)
+  def _update(self, block):
+    block = block[np.isfinite(block)] if block.dtype.kind == 'f' else block.ravel()
+    n = block.size
+    if n == 0:
+      return
+    bmin, bmax = block.min(), block.max()
+    bmean = block.mean(dtype=np.float64)
+    bm2 = np.sum((block - bmean) ** 2, dtype=np.float64)
+    if self.count == 0:
+      self.min, self.max, self.mean, self._m2 = bmin, bmax, bmean, bm2
+      # not bmin + (bmax - bmin) which can round below bmax
+      bhi = bmax if bmax > bmin else bmin + max(abs(bmin), 1.)
+      self.bin_edges = np.linspace(bmin, bhi, len(self.hist) + 1)
+    else:
+      # Chan et al. parallel update of mean and variance
+      delta = bmean - self.mean
+      total = self.count + n
+      self.mean = self.mean + delta * n / total
+      self._m2 = self._m2 + bm2 + delta ** 2 * self.count * n / total
+      self.min, self.max = min(self.min, bmin), max(self.max, bmax)
+      self._rebin(bmin, bmax)
+    self.count += n
+    hist, _ = np.histogram(block, bins=self.bin_edges)
+    self.hist += hist
 class CoordTransform(ABC):
   """
   Collection of transformations between various coordinate
   systems useful for array manipulations.
+
+  Notes
+  -----
+  All transformations accept scalars as well as arrays
+  of any shape and are vectorised. Scalars are returned
+  for scalar input.
   """
+  roundings = ['nearest', 'round', 'floor', 'ceil']
+  def check_index(self, index, n):
+    """
+    Check if indices are within bounds 
+    of an axis.
+
+    Parameters
+    ----------
+    index : int / array
+        Array index (indices).
+    n : int
+        Number of points of the axis.
+
+    Raises
+    ------
+    IndexError
+        If any index is out of bounds.
+    """
+    inside = self.index_in_bounds(index, n)
+    if not np.all(inside):
+      bad = np.asarray(index)[~np.asarray(inside)]
+      raise IndexError('Incorrect array index: %s' % self._output(bad))
+  # -----------------------------------------------------------------------------
+  def index_in_bounds(self, index, n):
+    """
+    Returns
+    -------
+    bool / array
+        True for indices in range [0, n).
+    """
+    index = np.asarray(index)
+    return self._output((index >= 0) & (index < n))
+  # -----------------------------------------------------------------------------
   def node2index(self, node):
-    assert node >= 1
-    return node - 1
+    node = np.asarray(node)
+    assert np.all(node >= 1)
+    return self._output(node - 1)
   # -----------------------------------------------------------------------------
   def index2node(self, index):
-    return index + 1
+    return self._output(np.asarray(index) + 1)
   # -----------------------------------------------------------------------------  
-  # def kilometre2index(self, m, origin, dx, **kwargs):
-  #   # this 
-  #   return self.metre2index(m, origin, dx, **kwargs)
-  def metre2index(self, m, origin, dx, **kwargs):
+  def kilometre2index(self, km, origin, dx, **kwargs):
+    """
+    Like metre2index but for coordinates 
+    in kilometres (origin and dx still in metres).
+    """
+    return self.metre2index(np.asarray(km) * 1e3, origin, dx, **kwargs)
+  # -----------------------------------------------------------------------------
+  def index2kilometre(self, i, origin, dx, **kwargs):
+    """
+    Like index2metre but the output is in kilometres
+    (origin and dx still in metres).
+    """
+    return self._output(np.asarray(self.index2metre(i, origin, dx)) / 1e3)
+  # -----------------------------------------------------------------------------
+  def metre2index(self, m, origin, dx, rounding='nearest', **kwargs):
     """
     Convert metres to array index. If the result
-    is not an integer, the nearest integer is used.
+    is not an integer, it is rounded.
 
     Parameters
     ----------
-    m : float
-        Value in metres.
-    origin : float
+    m : float / array
+        Value(s) in metres.
+    origin : float / array
         Origin of coordinate axis.
-    dx : float
+    dx : float / array
         Grid interval along the axis.
+    rounding : str, optional
+        'nearest' (default) rounds half to even
+        like Python's round, 'round' rounds half 
+        away from zero, 'floor' and 'ceil' as in NumPy.
     
     Returns
     -------
-    int
-        Nearest index.
-    """
-    # origin = self.extent[axis][0]
-    i = (m - origin) / dx #self.dx[axis]
-    if not i.is_integer():
-      # self.__log.debug('Non-integer index. Taking its floor')
-      i = round(i)
-    return int(i) 
+    int / array
+        Index (indices).
+    
+    Notes
+    -----
+    Values within 1e-9 of an integer are treated as 
+    integers to make 'floor' and 'ceil' immune to 
+    round-off errors.
+    """
+    i = (np.asarray(m) - origin) / dx
+    i = self._round(i, rounding)
+    return self._output(i.astype(int))
   # -----------------------------------------------------------------------------  
-  def index2metre(self, i, origin, axis, **kwargs):
-    # origin = self.extent[axis][0]
-    # m = i * self.dx[axis] + origin
-    # return m
-    raise NotImplementedError()
+  def index2metre(self, i, origin, dx, **kwargs):
+    """
+    Convert array index to metres.
+
+    Parameters
+    ----------
+    i : int / array
+        Index (indices).
+    origin : float / array
+        Origin of coordinate axis.
+    dx : float / array
+        Grid interval along the axis.
+
+    Returns
+    -------
+    float / array
+        Value(s) in metres.
+    """
+    return self._output(np.asarray(i) * dx + origin)
   # -----------------------------------------------------------------------------  
   def metre2node(self, *args, **kwargs):
-    # not tested
     return self.index2node(self.metre2index(*args, **kwargs))
   # -----------------------------------------------------------------------------
-  def node2metre(self, node, axis, **kwargs):
-    # not tested
-    return self.index2metre(self.node2index(node), axis, **kwargs)      
+  def node2metre(self, node, origin, dx, **kwargs):
+    return self.index2metre(self.node2index(node), origin, dx, **kwargs)      
   # -----------------------------------------------------------------------------
-  def box2inds(self, box, **kwargs):
+  def box2inds(self, box, extent, dx, **kwargs):
     """
     Convert box into slicing-indices using extent.
-    Not tested.
+
+    Parameters
+    ----------
+    box : list / array
+        [x1, x2, y1, y2, ...] in metres.
+    extent : list / array
+        [[x1, x2], [y1, y2], ...] in metres.
+    dx : list / array
+        Grid interval along each axis.
+    **kwargs
+        Passed to metre2index.
+
+    Returns
+    -------
+    array
+        [[i1, i2], [j1, j2], ...] where i2 is
+        incremented by 1 for use with np.arange(i1, i2) 
+        etc. Axes with x1 == x2 are skipped (set to 0).
     """
     box = np.array(box)
-    extent = np.array(self.extent)
+    extent = np.array(extent)
     assert len(box.shape) == 1
     assert len(box) == len(extent.flatten())
     box = box.reshape(extent.shape)
-    inds = np.zeros(box.shape)
-    for axis, _ in enumerate(box):
-      b0, b1 = box[axis]
-      if b0 == b1: # FOR 2D (DOUBLE-CHECK)
-        # self.__log.warn('Skipping b0=b1=%s' % b0)
-        continue
-      inds[axis][0] = self._metre2index(b0, axis)
-      inds[axis][1] = self._metre2index(b1, axis) + 1 # NOTE: FOR np.arange(b1, b2) etc.
-      # self.__log.debug('axis %s: i1=%s, i2=%s' % (axis, inds[axis][0], inds[axis][1]))    
+    origin = extent[:, :1]
+    dx = np.reshape(dx, (-1, 1))
+    inds = np.asarray(self.metre2index(box, origin, dx, **kwargs))
+    inds[:, 1] += 1 # NOTE: FOR np.arange(b1, b2) etc.
+    inds[box[:, 0] == box[:, 1]] = 0 # FOR 2D (DOUBLE-CHECK)
     return inds.astype(int)
   # -----------------------------------------------------------------------------
+  def _output(self, x):
+    x = np.asarray(x)
+    return x.item() if x.ndim == 0 else x
+  def _round(self, i, rounding):
+    if rounding not in self.roundings:
+      raise ValueError('Unknown rounding: %s' % rounding)
+    nearest = np.rint(i)
+    i = np.where(np.abs(i - nearest) < 1e-9, nearest, i)
+    if rounding == 'nearest':
+      i = np.rint(i)
+    elif rounding == 'round':
+      i = np.sign(i) * np.floor(np.abs(i) + 0.5)
+    elif rounding == 'floor':
+      i = np.floor(i)
+    elif rounding == 'ceil':
+      i = np.ceil(i)
+    return i
@@ -6,6 +6,15 @@ and conveniently.
 """
 from abc import ABC, abstractmethod
 from autologging import logged, traced
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from glob import glob
+import hashlib
+import importlib
+import json
+import os
+import re
+import threading
 import numpy as np
 
 def extent2str(extent):
@@ -47,6 +56,21 @@ def shape2str(shape):
     s = '%s' % shape
   s = 'shape%s' % s
   return s  
+def str2shape(s):
+  """
+  Inverse of `shape2str`, it finds 
+  the shape in any string, e.g. a file name
+  like 'p14-StartVp_shape341x361x81.mmp'.
+
+  Returns
+  -------
+  tuple
+      Shape or None if not found.
+  """
+  match = re.search(r'shape(\d+(?:x\d+)*)', s)
+  if match is None:
+    return None
+  return tuple(int(i) for i in match.group(1).split('x'))
 @logged
 class File(ABC):
   def __init__(self, name, path, **kwargs):
@@ -55,78 +79,821 @@ class File(ABC):
     self.name = name
     self.path = path
     self.fname = path + name
+@logged
 class FileReader(ABC):
+  @staticmethod
   def read_any(fname, overwrite_mmp=False, **kwargs):
     """
-    Read file of any format, possibly as a 
-    memory-mapped file if both the file is 
-    present on disk and the shape of the array 
-    is provided. FILE MUST CONTAIN AN ARRAY.
+    Read file of any format, as a memory-mapped
+    file cached next to it (.mmp extension).
+    FILE MUST CONTAIN AN ARRAY.
+
+    The cache is self-describing (see save_mmp),
+    so no shape is needed to read it. It is re-created
+    automatically if the source file or the reader 
+    kwargs (e.g. columns, dtype) change.
+    Formats read as memory-mapped arrays anyway 
+    (e.g. .npy, IEEE-float SEG-Y) or read lazily 
+    chunk by chunk (.chk, .chkz) are not cached.
     
+    overwrite_mmp : bool
+      Re-create the cache even if it is valid.
     shape : tuple
-      Shape of the array stored in fname.
-      (this is necessary to read .mmp).
+      Shape of the array stored in a legacy cache 
+      (without metadata), which can not be read 
+      without it.
     
     """
-    from .memmap import read_mmp, save_mmp
-    
     if overwrite_mmp:
-      read_any._log.info('Set overwrite_mmp=False for faster i/o!')
+      FileReader.__log.info('Set overwrite_mmp=False for faster i/o!')
     else:
-      read_any._log.info('If the array looks corrupted try overwrite_mmp=True.')
+      FileReader.__log.info('If the array looks corrupted try overwrite_mmp=True.')
 
-    shape = kw('shape', None, kwargs)
+    shape = kwargs.get('shape', None)
+    options = _reader_options(kwargs)
     
-    fname_mmp = strip(fname) + '.mmp'
-    
-    if not exists(fname_mmp) or overwrite_mmp:
-      read_any._log.debug(fname_mmp+' does not exist. Reading ' + 
-                        fname + ' instead...')
-      A = read_any_format(fname, **kwargs)
-      read_any._log.info('Saving ' + fname_mmp + '...')
-      save_mmp(A, fname_mmp)
-
-    elif shape is None:
-      read_any._log.debug('File ' + fname_mmp + ' exists, but you' +
-                        ' need to provide its shape to read it. Reading ' + 
-                        fname + ' instead...')
-      A = read_any_format(fname, **kwargs) 
-      
+    fname_mmp = os.path.splitext(fname)[0] + '.mmp'
+
+    if fname_mmp == fname:
+      A = read_mmp(fname, **kwargs)
+
+    elif not overwrite_mmp and mmp_is_valid(fname_mmp, fname, options):
+      FileReader.__log.debug(fname_mmp + ' is up to date.')
+      update_mmp_source(fname_mmp, fname)
+      A = read_mmp(fname_mmp)
+
+    elif not overwrite_mmp and os.path.exists(fname_mmp) and \
+      not os.path.exists(mmp_meta_fname(fname_mmp)) and shape is not None:
+      FileReader.__log.debug(fname_mmp + ' exists (no metadata) and its ' + 
+                        'shape is provided: ' + str(shape))
+      A = read_mmp(fname_mmp, **kwargs)
+
     else:
-      read_any._log.debug(fname_mmp+' exists and its shape is provided: ' +
-                        str(shape))
-      A = read_mmp(fname_mmp, **kwargs)    
+      FileReader.__log.debug(fname_mmp + ' does not exist or is outdated. ' + 
+                        'Reading ' + fname + ' instead...')
+      A = read_any_format(fname, **kwargs)
+      from arrau.chunked import ChunkedArray
+      if not isinstance(A, (np.memmap, ChunkedArray)):
+        FileReader.__log.info('Saving ' + fname_mmp + '...')
+        axes = kwargs.get('axes', None)
+        if axes is None and kwargs.get('extent', None) is None:
+          # shape of the array read, not that of the kwargs
+          axes = registry.read_axes(fname, A.shape, 
+            **{k: v for k, v in kwargs.items() if k != 'shape'})
+        save_mmp(A, fname_mmp, source=fname, options=options, axes=axes, 
+          extent=kwargs.get('extent', None))
+        A = read_mmp(fname_mmp)
     
     return A
-def read_any_format(fname, **kwargs):
+  @staticmethod
+  def read_any_axes(fname, **kwargs):
+    """
+    Axes stored with the array read by read_any
+    (same kwargs), i.e. in the metadata of fname
+    if it is a .mmp file, or of its cache if it 
+    is valid for fname.
+
+    Returns
+    -------
+    list
+        List of ArrAxis or None if not stored.
+    """
+    fname_mmp = os.path.splitext(fname)[0] + '.mmp'
+    if not os.path.exists(mmp_meta_fname(fname_mmp)):
+      return None
+    if fname_mmp != fname and \
+      not mmp_is_valid(fname_mmp, fname, _reader_options(kwargs)):
+      return None
+    return read_mmp_axes(fname_mmp)
+@logged
+class FileCollection:
   """
-  Read an array from a file of
-  any format.
-  
+  Lazily stacked collection of array files
+  of the same shape, e.g. models of 
+  consecutive FWI iterations.
+
+  It behaves like a read-only array of 
+  shape (number of files, *shape of a file):
+  C[i] reads the i-th file, C[:, 100] slices
+  all of them (concurrently), and iterating 
+  yields the files one by one, reading the next 
+  `prefetch` ones in the background meanwhile.
+  Files are opened with FileReader.read_any.
   """
-  from fullwavepy.ioapi.fw3d import read_vtr, read_ttr
-  from fullwavepy.ioapi.segy import read_sgy
-  from fullwavepy.ioapi.memmap import read_mmp
-  
-  read_any_format._log.debug('Reading ' + fname + '...')
-  ext = exten(fname, **kwargs)
+  def __init__(self, fnames, prefetch=2, n_workers=None, **kwargs):
+    """
+    Parameters
+    ----------
+    fnames : str / list
+        Glob pattern, e.g. 'p*-StartVp_shape341x361x81.mmp',
+        or list of files. Files matching a pattern are
+        sorted in natural order (p2 before p10).
+    prefetch : int, optional
+        Number of files following the one 
+        accessed to read in the background, by default 2.
+    n_workers : int, optional
+        Number of threads, by default 
+        ThreadPoolExecutor's default.
+    **kwargs
+        Passed to FileReader.read_any.
+    """
+    if isinstance(fnames, str):
+      fnames = sorted(glob(fnames), key=self._natural_key)
+    if len(fnames) == 0:
+      raise ValueError('No files to read.')
+    self.fnames = list(fnames)
+    self.prefetch = prefetch
+    self.kwargs = kwargs
+    self.executor = ThreadPoolExecutor(n_workers)
+    self._lock = threading.Lock()
+    self._locks = [threading.Lock() for _ in self.fnames]
+    self._opened = {}
+    self._loaded = OrderedDict()
+    first = self.open(0)
+    self.shape = (len(self.fnames),) + tuple(first.shape)
+    self.dtype = first.dtype
+  def __array__(self, dtype=None, copy=None):
+    A = self[:]
+    return A if dtype is None else A.astype(dtype)
+  def __enter__(self):
+    return self
+  def __exit__(self, *args):
+    self.close()
+  def __getitem__(self, key):
+    key = key if isinstance(key, tuple) else (key,)
+    if key[0] is Ellipsis:
+      key = (slice(None),) * (self.ndim - len(key) + 1) + key[1:]
+    i, rest = key[0], key[1:]
+    if isinstance(i, (int, np.integer)):
+      if self._is_full(rest):
+        return self.get(i)
+      return np.asarray(self.open(i)[rest])
+    indices = np.arange(len(self))[i]
+    if self._is_full(rest):
+      # read whole files concurrently, through the prefetching
+      # window (the futures outlive their eviction from it)
+      futures = [self._load(j) for j in indices]
+      arrays = [future.result() for future in futures]
+    else:
+      arrays = list(self.executor.map(lambda j: \
+        np.asarray(self.open(j)[rest]), indices))
+    if len(arrays) == 0:
+      return np.empty((0,) + self.shape[1:], self.dtype)[(slice(None),) + rest]
+    return np.stack(arrays)
+  def __iter__(self):
+    for i in range(len(self)):
+      yield self.get(i)
+  def __len__(self):
+    return len(self.fnames)
+  @property
+  def ndim(self):
+    return len(self.shape)
+  def close(self):
+    self.executor.shutdown(wait=True)
+  def get(self, i, prefetch=True):
+    """
+    Read the i-th file into memory and 
+    prefetch the following ones.
+
+    Returns
+    -------
+    array
+    """
+    i = range(len(self))[i]
+    future = self._load(i)
+    if prefetch:
+      for j in range(i + 1, min(i + 1 + self.prefetch, len(self))):
+        self._load(j)
+    return future.result()
+  def open(self, i):
+    """
+    Open the i-th file (as memory-mapped,
+    not read into memory).
+
+    Returns
+    -------
+    np.memmap
+    """
+    i = range(len(self))[i]
+    with self._locks[i]:
+      if i not in self._opened:
+        self._opened[i] = FileReader.read_any(self.fnames[i], **self.kwargs)
+    return self._opened[i]
+  def open_all(self):
+    """
+    Open all files concurrently, e.g. to
+    create their .mmp caches in parallel.
+
+    Returns
+    -------
+    list
+        List of np.memmap.
+    """
+    return list(self.executor.map(self.open, range(len(self))))
+  # -----------------------------------------------------------------------------
+  def _is_full(self, key):
+    return all(isinstance(k, slice) and k == slice(None) for k in key)
+  def _load(self, i):
+    """
+    Submit reading of the i-th file into memory,
+    keeping up to prefetch + 1 files read.
+    """
+    with self._lock:
+      if i in self._loaded:
+        self._loaded.move_to_end(i)
+        return self._loaded[i]
+      self.__log.debug('Reading ' + self.fnames[i])
+      future = self.executor.submit(lambda: np.array(self.open(i)))
+      self._loaded[i] = future
+      while len(self._loaded) > self.prefetch + 1:
+        self._loaded.popitem(last=False)
+    return future
+  @staticmethod
+  def _natural_key(fname):
+    return [int(s) if s.isdigit() else s for s in re.split(r'(\d+)', fname)]
+def mmp_is_valid(fname_mmp, source, options=None):
+  """
+  Check if a memory-mapped cache of 
+  a source file is up to date.
+
+  Parameters
+  ----------
+  fname_mmp : str
+      Cache file saved with save_mmp.
+  source : str
+      File the cache was created from.
+  options : dict, optional
+      Reader kwargs the cache was created with
+      (see save_mmp).
+
+  Returns
+  -------
+  bool
+      False if the cache or its metadata is missing,
+      it was created from another file or with 
+      different options, or the source changed 
+      since (different size, or different mtime 
+      and content hash).
+
+  Notes
+  -----
+  Nothing is written, see update_mmp_source.
+  """
+  fname_meta = mmp_meta_fname(fname_mmp)
+  if not (os.path.exists(fname_mmp) and os.path.exists(fname_meta)):
+    return False
+  meta = read_mmp_meta(fname_mmp)
+  stored = meta.get('source', None)
+  if stored is None or not os.path.exists(source):
+    return False
+  if stored['fname'] != os.path.abspath(source):
+    return False
+  if stored.get('options', {}) != (options or {}):
+    return False
+  stat = os.stat(source)
+  if stat.st_size != stored['size']:
+    return False
+  if stat.st_mtime == stored['mtime']:
+    return True
+  # touched but maybe unchanged
+  return _file_hash(source) == stored['hash']
+def update_mmp_source(fname_mmp, source):
+  """
+  Update the mtime of the source stored 
+  with a valid cache (see mmp_is_valid), 
+  so that the source is not hashed again
+  until it is touched again.
+  """
+  meta = read_mmp_meta(fname_mmp)
+  mtime = os.stat(source).st_mtime
+  if meta['source']['mtime'] != mtime:
+    meta['source']['mtime'] = mtime
+    _write_json(meta, mmp_meta_fname(fname_mmp))
+def mmp_meta_fname(fname_mmp):
+  """
+  Name of the JSON sidecar file storing 
+  metadata of a memory-mapped array.
+  """
+  return fname_mmp + '.json'
+def read_mmp(fname, mode='r', **kwargs):
+  """
+  Read a memory-mapped array.
+
+  Parameters
+  ----------
+  fname : str
+      File saved with save_mmp. Files without
+      metadata (legacy) require kwargs shape 
+      (and dtype, by default np.float32), unless
+      the shape is in the file name (see str2shape).
+  mode : str, optional
+      See np.memmap, by default 'r' (read-only).
+
+  Returns
+  -------
+  np.memmap
+      Array.
+  """
+  if os.path.exists(mmp_meta_fname(fname)):
+    meta = read_mmp_meta(fname)
+    dtype = np.dtype(meta['dtype'])
+    shape = tuple(meta['shape'])
+    order = meta['order']
+  else:
+    dtype = kwargs.get('dtype', np.float32)
+    shape = kwargs.get('shape', None) or str2shape(os.path.basename(fname))
+    if shape is None:
+      raise ValueError('No metadata nor shape provided for ' + fname)
+    order = 'C'
+  return np.memmap(fname, dtype=dtype, mode=mode, shape=shape, order=order)
+def read_mmp_meta(fname):
+  """
+  Read metadata of a memory-mapped array
+  saved with save_mmp.
+
+  Returns
+  -------
+  dict
+      See save_mmp.
+  """
+  with open(mmp_meta_fname(fname)) as f:
+    return json.load(f)
+def read_mmp_axes(fname):
+  """
+  Read axes of a memory-mapped array
+  saved with save_mmp.
+
+  Returns
+  -------
+  list
+      List of ArrAxis or None if the axes 
+      were not saved.
+  """
+  return meta2axes(read_mmp_meta(fname))
+def save_mmp(A, fname, source=None, axes=None, extent=None, options=None, **kwargs):
+  """
+  Save an array as a memory-mapped file
+  with metadata in a JSON sidecar file 
+  (see mmp_meta_fname).
+
+  Parameters
+  ----------
+  A : array / Arr
+      Array to save. Axes of Arr are saved too.
+  fname : str
+      Output file.
+  source : str, optional
+      File the array was read from. Its size, mtime
+      and hash are saved to validate the cache 
+      (see mmp_is_valid).
+  axes : list, optional
+      List of ArrAxis.
+  extent : list, optional
+      [[x1, x2], ...] used if no axes are provided.
+  options : dict, optional
+      Reader kwargs the source was read with
+      (see _reader_options), saved with its signature.
   
-  ext = ext.lower() # convert to lower case
-
-  if ext == 'vtr':
-    A = read_vtr(fname, **kwargs)
-  elif ext == 'ttr':
-    A = read_ttr(fname, **kwargs)    
-  elif ext == 'sgy' or ext == 'segy':
-    A = read_sgy(fname, **kwargs)
-  elif ext == 'mmp':
-    A = read_mmp(fname, **kwargs)
-  elif ext == 'txt':
-    c = read_txt(fname, **kwargs)
-    A = np.zeros((1,1,len(c)))
-    A[0,0,:] = [float(i[0]) for i in c]    
+  Notes
+  -----
+  Metadata contains dtype (incl. byte order), shape, 
+  memory order, axes (param, unit, extent, label) 
+  and source-file signature.
+
+  Data is copied chunk by chunk, so A can be a lazy
+  array-like (e.g. segy.IbmFloatArray) bigger than memory.
+  """
+  if hasattr(A, 'axes'):
+    axes = A.axes if axes is None else axes
+    A = A.arr
+  if not hasattr(A, 'shape'):
+    A = np.asanyarray(A)
+  fortran = isinstance(A, np.ndarray) and A.flags.f_contiguous \
+    and not A.flags.c_contiguous
+  order = 'F' if fortran else 'C'
+  mm = np.memmap(fname, dtype=A.dtype, mode='w+', shape=A.shape, order=order)
+  if len(A.shape) == 0:
+    mm[...] = np.asarray(A)
   else:
-    raise ValueError('Unknown extension: ' + ext)
+    step = max(1, 2**24 // max(1, A.dtype.itemsize * int(np.prod(A.shape[1:]))))
+    for i in range(0, A.shape[0], step):
+      mm[i : i + step] = A[i : i + step]
+  mm.flush()
+  del mm
+  meta = {
+    'dtype': A.dtype.str,
+    'shape': list(A.shape),
+    'order': order,
+    'byteorder': 'little' if A.dtype.str[0] in '<|' else 'big',
+    'axes': None,
+    'source': None,
+  }
+  meta['axes'] = axes2meta(axes, extent)
+  if source is not None:
+    stat = os.stat(source)
+    meta['source'] = dict(fname=os.path.abspath(source), size=stat.st_size, 
+      mtime=stat.st_mtime, hash=_file_hash(source), options=options or {})
+  _write_json(meta, mmp_meta_fname(fname))
+def axes2meta(axes=None, extent=None):
+  """
+  Convert axes to JSON-able metadata,
+  see save_mmp and meta2axes.
+
+  Parameters
+  ----------
+  axes : list, optional
+      List of ArrAxis.
+  extent : list, optional
+      [[x1, x2], ...] used if no axes are provided.
+
+  Returns
+  -------
+  list
+      List of dicts or None if neither is provided.
+  """
+  if axes is not None:
+    return [dict(param=ax.param, unit=ax.unit, extent=_tolist(ax.extent),
+      label=ax.label) for ax in axes]
+  elif extent is not None:
+    return [dict(param=p, unit='m', extent=_tolist(e), label=None) \
+      for p, e in zip('xyz', extent)]
+  return None
+def meta2axes(meta):
+  """
+  Inverse of axes2meta.
+
+  Parameters
+  ----------
+  meta : dict
+      Metadata with 'axes' and 'shape' entries.
+
+  Returns
+  -------
+  list
+      List of ArrAxis or None if not stored.
+  """
+  from arrau.generic import ArrAxis
+  if meta.get('axes', None) is None:
+    return None
+  return [ArrAxis(ax['param'], n, unit=ax['unit'], extent=ax['extent'], \
+    label=ax['label']) for ax, n in zip(meta['axes'], meta['shape'])]
+def _reader_options(kwargs):
+  """
+  Reader kwargs affecting the data read (all 
+  but those of the Arr constructor and shape, 
+  which is only needed by legacy caches), converted 
+  to JSON types so that they compare equal
+  to those stored in a cache's metadata.
+  """
+  skip = ['overwrite_mmp', 'axes', 'extent', 'shape', 'slice_cache_size', 
+    'max_slices']
+  options = {k: v for k, v in kwargs.items() if k not in skip}
+  return json.loads(json.dumps(options, sort_keys=True, default=_json_default))
+def _json_default(x):
+  if isinstance(x, np.ndarray):
+    return x.tolist()
+  if isinstance(x, np.generic):
+    return x.item()
+  try:
+    return np.dtype(x).str
+  except TypeError:
+    return str(x)
+def _file_hash(fname, blocksize=2**20):
+  h = hashlib.sha1()
+  with open(fname, 'rb') as f:
+    for block in iter(lambda: f.read(blocksize), b''):
+      h.update(block)
+  return h.hexdigest()
+def _tolist(x):
+  return np.asarray(x).tolist()
+def _write_json(meta, fname):
+  with open(fname, 'w') as f:
+    json.dump(meta, f, indent=2)
+@logged
+class FormatRegistry:
+  """
+  Readers and writers of array files 
+  keyed by file extension (lower case) 
+  and magic bytes.
+
+  Readers and writers can be given as 
+  'module:function' strings, so that their 
+  modules are imported only on first use.
+  Third-party packages can register them 
+  through entry points of groups 
+  'arrau.readers' and 'arrau.writers' 
+  named by the extension, e.g. in pyproject.toml:
   
-  return A    
+  [project.entry-points."arrau.readers"]
+  vtr = "mypackage.io:read_vtr"
+  """
+  entry_point_groups = {'reader': 'arrau.readers', 'writer': 'arrau.writers'}
+  def __init__(self):
+    self._readers = {}
+    self._writers = {}
+    self._axes = {}
+    self._magic = []
+    self._entry_points_loaded = False
+  def extensions(self):
+    """
+    Returns
+    -------
+    list
+        Extensions with a registered reader.
+    """
+    self._load_entry_points()
+    return sorted(self._readers)
+  def get_reader(self, fname, ext=None):
+    """
+    Find the reader of a file.
+
+    Parameters
+    ----------
+    fname : str
+        File name.
+    ext : str, optional
+        Extension overriding that of fname.
+        
+    Returns
+    -------
+    function
+        reader(fname, **kwargs) returning an array.
+    """
+    return self._get('reader', self._readers, fname, ext)
+  def get_writer(self, fname, ext=None):
+    """
+    Like get_reader but returns 
+    writer(A, fname, **kwargs).
+    """
+    return self._get('writer', self._writers, fname, ext)
+  def read(self, fname, ext=None, **kwargs):
+    return self.get_reader(fname, ext)(fname, **kwargs)
+  def read_axes(self, fname, shape, ext=None, **kwargs):
+    """
+    Read the axes of an array stored in a file,
+    if its format has an axes reader (see register).
+
+    Returns
+    -------
+    list
+        List of ArrAxis or None.
+    """
+    try:
+      func = self._get('axes', self._axes, fname, ext)
+    except ValueError:
+      return None
+    return func(fname, shape, **kwargs)
+  def register(self, ext, reader=None, writer=None, magic=None, axes=None):
+    """
+    Register a file format.
+
+    Parameters
+    ----------
+    ext : str / list
+        Extension(s) without the dot.
+    reader : function / str, optional
+        reader(fname, **kwargs) returning an array
+        or 'module:function' string.
+    writer : function / str, optional
+        writer(A, fname, **kwargs) 
+        or 'module:function' string.
+    magic : bytes, optional
+        Leading bytes identifying the format
+        in files of unknown extension.
+    axes : function / str, optional
+        axes(fname, shape, **kwargs) returning
+        a list of ArrAxis (e.g. from a header)
+        or 'module:function' string.
+    """
+    exts = [ext] if isinstance(ext, str) else ext
+    for ext in exts:
+      ext = ext.lower()
+      if reader is not None:
+        self._readers[ext] = reader
+      if writer is not None:
+        self._writers[ext] = writer
+      if axes is not None:
+        self._axes[ext] = axes
+      if magic is not None:
+        self._magic.append((magic, ext))
+  def write(self, A, fname, ext=None, **kwargs):
+    return self.get_writer(fname, ext)(A, fname, **kwargs)
+  # -----------------------------------------------------------------------------
+  def _get(self, kind, funcs, fname, ext):
+    self._load_entry_points()
+    ext = os.path.splitext(fname)[1][1:] if ext is None else ext
+    ext = ext.lower() # convert to lower case
+    if ext not in funcs and kind == 'reader':
+      ext = self._sniff(fname, ext)
+    if ext not in funcs:
+      raise ValueError('Unknown extension: ' + ext)
+    func = funcs[ext]
+    if isinstance(func, str):
+      module, name = func.split(':')
+      self.__log.debug('Importing %s of .%s from %s' % (kind, ext, module))
+      func = getattr(importlib.import_module(module), name)
+      funcs[ext] = func
+    elif hasattr(func, 'load'): # entry point
+      func = func.load()
+      funcs[ext] = func
+    return func
+  def _load_entry_points(self):
+    if self._entry_points_loaded:
+      return
+    self._entry_points_loaded = True
+    from importlib.metadata import entry_points
+    for kind, group in self.entry_point_groups.items():
+      for ep in entry_points(group=group):
+        # don't load them yet
+        self.register(ep.name, **{kind: ep})
+  def _sniff(self, fname, ext):
+    """
+    Identify the format by magic bytes.
+    """
+    if not os.path.isfile(fname) or not self._magic:
+      return ext
+    with open(fname, 'rb') as f:
+      head = f.read(max([len(m) for m, _ in self._magic]))
+    for magic, magic_ext in self._magic:
+      if head.startswith(magic):
+        return magic_ext
+    return ext
+def read_npy(fname, **kwargs):
+  """
+  Read a .npy file as a memory-mapped array.
+  """
+  return np.load(fname, mmap_mode='r')
+def read_raw(fname, shape=None, dtype=np.float32, offset=0, order='C', **kwargs):
+  """
+  Read a raw binary file as a memory-mapped array.
+
+  Parameters
+  ----------
+  shape : tuple, optional
+      By default 1d array of all the data.
+  dtype : dtype, optional
+      By default np.float32.
+  offset : int, optional
+      Number of bytes to skip (e.g. a header), by default 0.
+  order : str, optional
+      'C' or 'F', by default 'C'.
+  """
+  return np.memmap(fname, dtype=dtype, mode='r', shape=shape, offset=offset, 
+    order=order)
+def read_txt(fname, columns=None, dtype=np.float64, delimiter=None, 
+  comments='#', chunk_size=2**16, **kwargs):
+  """
+  Read columns of a text (e.g. CSV) file.
+
+  Parameters
+  ----------
+  fname : str
+      Text file. It can start with a header of
+      comment lines 'key: value', followed by
+      a line of column names, e.g.:
+        # extent: 0 10.5
+        # unit: s
+        time,amplitude
+        0.0,1.2
+        ...
+      Header keys used: extent (of the sample axis),
+      unit and param (of the sample axis).
+  columns : int / str / list, optional
+      Column(s) to read, by index or name.
+      By default all.
+  dtype : dtype, optional
+      By default np.float64.
+  delimiter : str, optional
+      By default any whitespace.
+  comments : str, optional
+      By default '#'.
+  chunk_size : int, optional
+      Number of lines parsed at once, by default 2**16.
+
+  Returns
+  -------
+  array
+      1d array for a single column, otherwise 
+      2d array with a column per row (trace).
+      See read_txt_axes for the axes.
+  """
+  from itertools import islice
+  header, names, nskip = read_txt_header(fname, delimiter, comments)
+  usecols = columns
+  if isinstance(columns, (str, int)):
+    usecols = [columns]
+  if usecols is not None:
+    usecols = [names.index(c) if isinstance(c, str) else c for c in usecols]
+  chunks = []
+  with open(fname) as f:
+    lines = islice(f, nskip, None)
+    while True:
+      chunk = list(islice(lines, chunk_size))
+      if not chunk:
+        break
+      chunks.append(np.loadtxt(chunk, dtype=dtype, delimiter=delimiter, 
+        comments=comments, usecols=usecols, ndmin=2))
+  A = np.concatenate(chunks) if chunks else np.zeros((0, 1), dtype)
+  A = A.T
+  if len(A) == 1:
+    return A[0]
+  return A
+def read_txt_axes(fname, shape, delimiter=None, comments='#', **kwargs):
+  """
+  Axes of an array read by read_txt, 
+  the sample axis described by the header.
+
+  Parameters
+  ----------
+  shape : tuple
+      Shape of the array.
+
+  Returns
+  -------
+  list
+      List of ArrAxis.
+  """
+  from arrau.generic import ArrAxis
+  header, _, _ = read_txt_header(fname, delimiter, comments)
+  axis = ArrAxis(header.get('param', 't'), shape[-1], unit=header.get('unit', 's'),
+    extent=header.get('extent', None))
+  if len(shape) == 1:
+    return [axis]
+  return [ArrAxis('column', shape[0]), axis]
+def read_txt_header(fname, delimiter=None, comments='#'):
+  """
+  Read the header of a text file, see read_txt.
+
+  Returns
+  -------
+  header : dict
+      Values of 'key: value' comment lines
+      (extent as a list of floats).
+  names : list
+      Column names (empty if not present).
+  nskip : int
+      Number of header lines.
+  """
+  header = {}
+  names = []
+  nskip = 0
+  with open(fname) as f:
+    for line in f:
+      stripped = line.strip()
+      if stripped.startswith(comments):
+        key, sep, value = stripped[len(comments):].partition(':')
+        if sep:
+          header[key.strip()] = value.strip()
+        nskip += 1
+        continue
+      if not stripped:
+        nskip += 1
+        continue
+      fields = stripped.split(delimiter)
+      try:
+        [float(i) for i in fields]
+      except ValueError:
+        names = [i.strip() for i in fields]
+        nskip += 1
+      break
+  if 'extent' in header:
+    header['extent'] = [float(i) for i in header['extent'].replace(',', ' ').split()]
+  return header, names, nskip
+def save_npy(A, fname, **kwargs):
+  np.save(fname, np.asanyarray(getattr(A, 'arr', A)))
+def save_raw(A, fname, **kwargs):
+  np.asanyarray(getattr(A, 'arr', A)).tofile(fname)
+def read_any_format(fname, **kwargs):
+  """
+  Read an array from a file of
+  any format registered in `registry`.
+
+  Parameters
+  ----------
+  fname : str
+      File name.
+  ext : str, optional
+      Extension overriding that of fname.
+  **kwargs 
+      Passed to the reader.
+  """
+  return registry.read(fname, **kwargs)
+def write_any_format(A, fname, **kwargs):
+  """
+  Write an array to a file of
+  any format registered in `registry`.
+  """
+  return registry.write(A, fname, **kwargs)
+
 
+registry = FormatRegistry()
+registry.register('mmp', reader=read_mmp, writer=save_mmp)
+registry.register('npy', reader=read_npy, writer=save_npy, magic=b'\x93NUMPY')
+registry.register(['bin', 'raw', 'dat'], reader=read_raw, writer=save_raw)
+registry.register('txt', reader=read_txt, axes=read_txt_axes)
+registry.register('vtr', reader='fullwavepy.ioapi.fw3d:read_vtr')
+registry.register('ttr', reader='fullwavepy.ioapi.fw3d:read_ttr')
+registry.register(['sgy', 'segy'], reader='arrau.segy:read_segy', 
+  writer='arrau.segy:write_segy')
+registry.register(['chk', 'chkz'], reader='arrau.chunked:read_chunked', 
+  writer='arrau.chunked:save_chunked')
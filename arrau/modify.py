@@ -1,11 +1,14 @@
 """
 Array modifiers
 """
+import mmap
+import os
+from concurrent.futures import Executor, ThreadPoolExecutor
 import numpy as np
 from autologging import logged
 
 @logged
-def modify_array(A, *args, **kwargs):
+def modify_array(A, *args, out=None, **kwargs):
   """
   Modify each trace (last dimension) 
   of a 1D/2D/3D array using a list 
@@ -31,7 +34,22 @@ def modify_array(A, *args, **kwargs):
       for cleanliness.
       Modifiers are allowed to have *args and **kwargs
       so lambda functions are not recommended as 
-      modifiers.
+      modifiers. Modifiers decorated with @vectorised
+      are applied to all traces at once, others
+      trace by trace.
+  out : array / str / file, optional
+    Output buffer, e.g. A itself to modify it
+    in place, or a file to memory-map the output,
+    see ModifierPipeline.
+  chunk_size : int, optional
+    Number of traces processed at once, by default
+    None (all). Set it to process memory-mapped
+    arrays larger than memory, see ModifierPipeline.
+  n_workers : int, optional
+    Number of parallel workers, see ModifierPipeline.
+  executor : str / Executor, optional
+    'thread', 'process' or an Executor instance,
+    see ModifierPipeline.
   
   Returns
   -------
@@ -43,106 +61,90 @@ def modify_array(A, *args, **kwargs):
   is the last dimension of the array.
   
   """
-  array_modifiers = _set_array_modifiers(**kwargs)
-  tracewise_modifiers = _set_tracewise_modifiers(**kwargs)
+  return ModifierPipeline(*args, **kwargs)(A, out=out)
+def apply_tracewise(func, A, *args, **kwargs):
+  """
+  Apply a tracewise modifier to all traces
+  (last dimension) of an array.
 
-  A = np.array(A)
+  Parameters
+  ----------
+  func : function
+      Modifier. If decorated with @vectorised,
+      it is called once for the whole array. 
+      Otherwise it is called for each trace 
+      separately by np.apply_along_axis (slow).
+  A : array
+      1D/2D/3D array.
 
-  for func in array_modifiers:
-    A = func(A, *args, **kwargs)
+  Returns
+  -------
+  array
+      Modified A.
+  """
+  if getattr(func, 'vectorised', False):
+    return func(A, *args, **dict(kwargs, axis=-1))
+  return np.apply_along_axis(func, -1, A, *args, **kwargs)
+def vectorised(func):
+  """
+  Decorator declaring that a tracewise 
+  modifier processes all traces at once
+  if given an `axis` keyword argument.
+  """
+  func.vectorised = True
+  return func
+@vectorised
+def derivative(A, *args, axis=-1, deriv=1, **kwargs):
+  """
+  Derivative of each trace with respect
+  to sample number.
 
-  for func in tracewise_modifiers:
-    A = np.apply_along_axis(func, -1, A, *args, **kwargs)
-  
+  Parameters
+  ----------
+  deriv : int
+      Order of the derivative, by default 1.
+  """
+  for _ in range(int(deriv)):
+    A = np.gradient(A, axis=axis)
   return A
-@logged
-def _set_array_modifiers(**kwargs):
+@vectorised
+def dft(A, *args, axis=-1, **kwargs):
   """
-  Notes
-  -----
-  norm_bulk acts on the whole array,
-  and norm acts trace-wise, but they both
-  call the same function. FIXME: common interface
+  Amplitude spectrum of each trace.
   """
-  #from ..dsp.su import su_process
-  from fullwavepy.numeric.generic import norm_bulk_max
-  modifiers = kwargs.get('array_modifiers', [])  
-  
-  clip = kwargs.get('clip', None)
-  clip_min = kwargs.get('clip_min', None)  
-  clip_max = kwargs.get('clip_max', None)
-  norm_bulk = kwargs.get('norm_bulk', None)  
-  func = kwargs.get('func', None)
-
-  # bulk-normalization (must be BEFORE clipping)
-  if norm_bulk is not None:
-    modifiers.append(norm_bulk_max) 
-
-  if clip is not None or clip_min is not None or clip_max is not None:
-    modifiers.append(clip_array)
-    
-  #if func is not None:
-    #modifiers.append(su_process)
-  
-  return modifiers
-@logged
-def _set_tracewise_modifiers(**kwargs):
+  return np.abs(np.fft.rfft(A, axis=axis))
+@vectorised
+def normalize(A, *args, axis=-1, norm='max', out=None, **kwargs):
   """
-  Set a list of functions to modify 
-  a trace / an array of traces.
-  
+  Normalise each trace.
+
   Parameters
   ----------
-  **kwargs : keyword arguments (optional)
-    Current capabilities:
-    modifiers : list
-      List of functions to apply subsequently 
-      on each trace. The order is following:
-      [func1, func2, ...] 
-      first func1 will be applied and so on.
-      Note that order of the elements is 
-      opposite to the composite function's 
-      notation:
-      ...(func2(func1(trace))
-  
-  Returns
-  -------
-  modifiers : list 
-    List of modifiers.
-  
+  norm : str
+      'max' (max. absolute value, default) 
+      or 'l2' (Euclidean norm).
+  out : array, optional
+      Output buffer, e.g. A to normalise in place.
+
   Notes
   -----
-  The order matters, they don't commute in general.
-  
-  We could use lambda functions, but we want to 
-  pass **kwargs to modifiers, and it is bad to 
-  define lambda functions with *args, **kwargs.
-  
-  Clipping is done before normalization.
-  
+  Traces of zero norm are left unchanged.
   """
-  from fullwavepy.numeric.generic import normalize
-  from fullwavepy.numeric.operators import derivative
-  from fullwavepy.numeric.fourier import dft
-  
-  modifiers = kwargs.get('tracewise_modifiers', [])
-  norm = kwargs.get('norm', None)
-  spect = kwargs.get('spect', None)
-  deriv = kwargs.get('deriv', None)
-  
-  # DERIVATIVE 
-  if deriv is not None:
-    modifiers.append(derivative)   
-  
-  # DISCRETE FOURIER TRANSFORM
-  if spect is not None:
-    modifiers.append(dft)
-  
-  # NORMALIZATION
-  if norm is not None:
-    modifiers.append(normalize)
-  
-  return modifiers
+  if norm == 'max' or norm is True:
+    n = np.max(np.abs(A), axis=axis, keepdims=True)
+  elif norm == 'l2':
+    n = np.linalg.norm(A, axis=axis, keepdims=True)
+  else:
+    raise ValueError('Unknown norm: %s' % norm)
+  n[n == 0] = 1
+  return np.divide(A, n, out=out)
+def norm_bulk_max(A, *args, **kwargs):
+  """
+  Normalise the whole array by its
+  max. absolute value (unless it is zero).
+  """
+  m = np.max(np.abs(A))
+  return A / m if m != 0 else A
 @logged
 def clip_array(A, clip=None, clip_min=None, clip_max=None):
   """
@@ -155,48 +157,416 @@ def clip_array(A, clip=None, clip_min=None, clip_max=None):
     clip_max = clip
 
   return np.clip(A, clip_min, clip_max)
-@logged
-def interlace_arrays(A1, A2, chunk_size=10):
+def interlace_arrays(*arrays, chunk_size=10, axis=0, out=None):
   """ 
   Create an array composed of interlaced 
-  chunks of A1 and A2. Each chunk counts `chunk_size` 
-  traces. First chunk is composed of A1 traces.
+  chunks of input arrays. Each chunk counts `chunk_size` 
+  traces. First chunk is composed of the first
+  array's traces, the second one of the second's
+  and so on, cyclically.
   
   Parameters
   ----------
-  A1, A2 : 2d arrays
+  *arrays : 1d/2d/3d arrays
+      Arrays of the same shape, at least two.
   chunk_size : int 
-      No. of columns of 1st array
+      No. of traces of 1st array
       followed by the same no. of
-      columns of the 2nd array. 
+      traces of the 2nd array etc.
+      Trailing chunk can be shorter. 
+  axis : int, optional
+      Axis along which chunks are interlaced, by default 0.
+  out : array, optional
+      Output buffer of the same shape as input arrays.
     
   Returns
   -------
   Z : array
-    2D array.
+    Array of the same shape as input arrays.
   
+  Notes
+  -----
+  Full cycles of chunks are copied through 
+  reshaped (strided) views, so that the only 
+  allocation is the output array.
+  The legacy call interlace_arrays(A1, A2, chunk_size)
+  is still supported.
   """
-  assert len(A1.shape) == 2
-  if A1.shape != A2.shape:
+  if len(arrays) > 2 and np.ndim(arrays[-1]) == 0: # legacy call
+    chunk_size = int(arrays[-1])
+    arrays = arrays[:-1]
+  if len(arrays) < 2:
+    raise ValueError('At least 2 arrays are needed.')
+  arrays = [np.asanyarray(A) for A in arrays]
+  shape = arrays[0].shape
+  if any([A.shape != shape for A in arrays]):
     raise ValueError('Arrays must have same shapes.')
+  if out is None:
+    out = np.empty(shape, np.result_type(*arrays))
+  elif out.shape != shape:
+    raise ValueError('Output must have the same shape as input arrays.')
   
-  A = np.array(A1)
-  ncols = A.shape[0]
-  
-  if ncols < 2 * chunk_size:
-    interlace_arrays._log.warning('No. of columns=' + str(ncols) + 
-           ' < 2 * chunk_size! Outputting empty array')
-    return []
-  
-  nchunks = ncols // chunk_size // 2
-  for i, Ai in enumerate([A1, A2]):
-    i_start = i * chunk_size
-    for j in range(nchunks):
-      i1 = i_start + j * 2 * chunk_size
-      i2 = i_start + j * 2 * chunk_size + (chunk_size) # IT USED TO BE WRONG (-1)
-      A[i1 : i2] = Ai[i1 : i2]
+  src = [np.moveaxis(A, axis, 0) for A in arrays]
+  dst = np.moveaxis(out, axis, 0)
+  ntraces = dst.shape[0]
+  period = len(arrays) * chunk_size
+  nfull = ntraces // period * period
+  # full cycles
+  cycles = (-1, len(arrays), chunk_size) + dst.shape[1:]
+  dst_cycles = dst[:nfull].reshape(cycles)
+  for i, Ai in enumerate(src):
+    dst_cycles[:, i] = Ai[:nfull].reshape(cycles)[:, i]
+  # trailing chunks (the last one can be incomplete)
+  for i, i1 in enumerate(range(nfull, ntraces, chunk_size)):
+    i2 = i1 + chunk_size
+    dst[i1 : i2] = src[i][i1 : i2]
 
-  return np.array(A)
+  return out
+class ModifierPipeline:
+  """
+  Modifiers of modify_array planned up front
+  and applied with as few full-size allocations
+  as possible.
+
+  Notes
+  -----
+  The order of modifiers is the same as 
+  in modify_array. Bulk normalisation and clipping 
+  are fused, i.e. applied block by block in a single 
+  pass after finding the bulk maximum. Derivatives 
+  swap between the output and a single scratch 
+  buffer, trace normalisation is done in place.
+
+  If chunk_size is set, the array is processed
+  out-of-core: chunk by chunk of whole traces, 
+  after a first pass computing the bulk reductions.
+  Only a chunk at a time is then held in memory
+  if both the input and the output are memory-mapped.
+
+  If n_workers or executor is set, chunks are 
+  processed in parallel. Threads are efficient 
+  for the built-in modifiers, as NumPy releases 
+  the GIL. Processes share the input and the output 
+  through their memory-mapped files or, if they are 
+  not memory-mapped, through shared memory. They 
+  require the modifiers to be picklable.
+  """
+  def __init__(self, *args, block_size=2**20, chunk_size=None, 
+    n_workers=None, executor=None, **kwargs):
+    """
+    Parameters
+    ----------
+    *args, **kwargs
+        Same as for modify_array (e.g. clip, clip_min, 
+        clip_max, norm_bulk, norm, deriv, spect).
+    block_size : int, optional
+        Approx. number of elements processed at once 
+        by fused modifiers, by default 2**20.
+    chunk_size : int, optional
+        Approx. number of traces processed at once
+        in the out-of-core mode, by default None, 
+        i.e. the whole array at once (or 4 chunks
+        per worker in the parallel mode).
+    n_workers : int, optional
+        Number of parallel workers, by default None,
+        i.e. serial processing unless executor is set
+        (then os.cpu_count() workers).
+    executor : str / Executor, optional
+        'thread' (default if n_workers is set), 'process'
+        or an instance of concurrent.futures.Executor.
+    """
+    self.args = args
+    self.kwargs = kwargs
+    self.block_size = block_size
+    self.chunk_size = chunk_size
+    self.n_workers = n_workers
+    self.executor = executor
+    self._plan(**kwargs)
+  def __call__(self, A, out=None):
+    """
+    Apply the modifiers.
+
+    Parameters
+    ----------
+    A : array
+        1D/2D/3D array, possibly memory-mapped.
+        It is not modified, unless out is A.
+    out : array / str / file, optional
+        Output buffer of the shape of the result,
+        e.g. A itself to modify it in place. 
+        If it is a file name or a file object, 
+        a new np.memmap is created in it.
+        By default a new array is allocated.
+
+    Returns
+    -------
+    array
+        Modified A (out if provided).
+    """
+    A = np.asanyarray(A)
+    chunked = self.chunk_size is not None or self._is_parallel()
+    if chunked and A.ndim > 1:
+      return self._apply_chunked(A, out)
+    for func in self.array_modifiers:
+      A = func(A, *self.args, **self.kwargs)
+    if out is not None and not isinstance(out, np.ndarray):
+      B = self._apply(A, None, self._get_scale(A))
+      out = self._allocate(out, B.shape, B.dtype)
+      out[...] = B
+      return out
+    return self._apply(A, out, self._get_scale(A))
+  def __getstate__(self):
+    # executor is only used by the parent process
+    state = self.__dict__.copy()
+    state['executor'] = None
+    return state
+  # -----------------------------------------------------------------------------
+  def _allocate(self, out, shape, dtype):
+    if out is None:
+      return np.empty(shape, dtype)
+    return np.memmap(out, dtype=dtype, mode='w+', shape=shape)
+  def _apply(self, A, out, scale):
+    """
+    Apply all (but user's array) modifiers 
+    in memory.
+    """
+    shape_fits = out is not None and out.shape == A.shape
+    B = out if shape_fits else np.empty(A.shape, self._get_dtype(A))
+    self._bulk(A, B, scale)
+    scratch = None
+    for func in self.tracewise_modifiers:
+      B = apply_tracewise(func, B, *self.args, **self.kwargs)
+    for _ in range(self.deriv):
+      if scratch is None or scratch.shape != B.shape:
+        scratch = np.empty_like(B)
+      B, scratch = self._gradient(B, scratch), B
+    if self.spect:
+      B = dft(B)
+    if self.norm is not None:
+      B = normalize(B, norm=self.norm, out=B)
+    if out is not None and B is not out:
+      out[...] = B
+      B = out
+    return B
+  def _apply_chunked(self, A, out):
+    """
+    Apply the modifiers chunk by chunk in two passes: 
+    the first one for the bulk reductions,
+    the second one for everything else.
+    """
+    if self.array_modifiers:
+      raise ValueError('Array modifiers can not be applied in chunks.')
+    scale = self._get_scale(A)
+    chunks = self._get_chunks(A)
+    # the first chunk defines the output
+    b = chunks[0]
+    B = self._apply(A[b], None, scale)
+    if out is None or not isinstance(out, np.ndarray):
+      out = self._allocate(out, A.shape[:1] + B.shape[1:], B.dtype)
+    out[b] = B
+    if self._is_parallel():
+      self._apply_parallel(A, out, chunks[1:], scale)
+    else:
+      for b in chunks[1:]:
+        self._apply(A[b], out[b], scale)
+    return out
+  def _apply_parallel(self, A, out, chunks, scale):
+    # imported here, as multiprocessing is slow to import
+    from concurrent.futures import ProcessPoolExecutor
+    if isinstance(self.executor, Executor):
+      executor = self.executor
+    else:
+      pool = {None: ThreadPoolExecutor, 'thread': ThreadPoolExecutor, 
+        'process': ProcessPoolExecutor}[self.executor]
+      executor = pool(self._get_n_workers())
+    try:
+      if isinstance(executor, ProcessPoolExecutor):
+        self._apply_in_processes(executor, A, out, chunks, scale)
+      else:
+        futures = [executor.submit(self._apply, A[b], out[b], scale) \
+          for b in chunks]
+        for f in futures:
+          f.result()
+    finally:
+      if executor is not self.executor:
+        executor.shutdown()
+  def _apply_in_processes(self, executor, A, out, chunks, scale):
+    src, src_shm = share_array(A)
+    dst, dst_shm = share_array(out, copy=False)
+    try:
+      futures = [executor.submit(_apply_shared, self, src, dst, b, scale) \
+        for b in chunks]
+      for f in futures:
+        f.result()
+      if dst_shm is not None:
+        shared, _ = attach_array(dst, shm=dst_shm)
+        for b in chunks:
+          out[b] = shared[b]
+        del shared
+    finally:
+      for shm in [src_shm, dst_shm]:
+        if shm is not None:
+          shm.close()
+          shm.unlink()
+  def _blocks(self, n, size):
+    """
+    Slices of the first axis of length n, each 
+    spanning approx. block_size elements 
+    (size elements per index).
+    """
+    step = max(1, self.block_size // max(1, size))
+    for i in range(0, n, step):
+      yield slice(i, min(i + step, n))
+  def _bulk(self, A, out, scale):
+    """
+    Fused bulk-normalisation and clipping of A
+    into out.
+    """
+    if A.ndim == 0:
+      out[...] = A
+      return
+    for b in self._blocks(A.shape[0], A[0].size):
+      if scale is None:
+        out[b] = A[b]
+      else:
+        np.multiply(A[b], scale, out=out[b])
+      if self.clip is not None:
+        np.clip(out[b], *self.clip, out=out[b])
+  def _get_chunks(self, A):
+    """
+    Slices of the first axis, each spanning 
+    approx. chunk_size whole traces.
+    """
+    n = A.shape[0]
+    traces_per_row = A[0].size // max(1, A.shape[-1])
+    chunk_size = self.chunk_size
+    if chunk_size is None:
+      ntraces = n * traces_per_row
+      chunk_size = -(-ntraces // (4 * self._get_n_workers()))
+    step = max(1, chunk_size // max(1, traces_per_row))
+    return [slice(i, min(i + step, n)) for i in range(0, n, step)]
+  def _get_dtype(self, A):
+    dtype = A.dtype
+    if self.clip is not None:
+      dtype = np.result_type(dtype, *[c for c in self.clip if c is not None])
+    if self.norm_bulk or self.deriv or self.spect or self.norm is not None:
+      dtype = np.result_type(dtype, np.float32)
+    return dtype
+  def _get_n_workers(self):
+    return self.n_workers or os.cpu_count()
+  def _get_scale(self, A):
+    """
+    Factor of the bulk normalisation 
+    computed block by block (None if not needed).
+    """
+    if not self.norm_bulk or A.ndim == 0:
+      return None
+    blocks = self._blocks(A.shape[0], A[0].size)
+    amax = max([np.max(np.abs(A[b])) for b in blocks], default=0)
+    return 1 / amax if amax != 0 else None
+  def _gradient(self, A, out):
+    """
+    Same as np.gradient(A, axis=-1) but 
+    written into out.
+    """
+    np.subtract(A[..., 2:], A[..., :-2], out=out[..., 1:-1])
+    out[..., 1:-1] *= 0.5
+    np.subtract(A[..., 1], A[..., 0], out=out[..., 0])
+    np.subtract(A[..., -1], A[..., -2], out=out[..., -1])
+    return out
+  def _is_parallel(self):
+    return self.n_workers is not None or self.executor is not None
+  def _plan(self, clip=None, clip_min=None, clip_max=None, norm_bulk=None, 
+    norm=None, spect=None, deriv=None, **kwargs):
+    """
+    Decide which modifiers to apply. They are
+    applied in this order (they don't commute):
+    user's array_modifiers, bulk normalisation 
+    (before clipping), clipping, user's 
+    tracewise_modifiers, derivative, amplitude 
+    spectrum and trace normalisation.
+    """
+    self.array_modifiers = list(kwargs.get('array_modifiers', []))
+    self.tracewise_modifiers = list(kwargs.get('tracewise_modifiers', []))
+    self.norm_bulk = norm_bulk is not None
+    if clip is not None:
+      clip_min = -clip
+      clip_max = clip
+    no_clip = clip_min is None and clip_max is None
+    self.clip = None if no_clip else (clip_min, clip_max)
+    self.deriv = 0 if deriv is None else int(deriv)
+    self.spect = spect is not None
+    self.norm = norm
+def attach_array(descr, mode='r+', shm=None):
+  """
+  Access an array shared by share_array.
+
+  Parameters
+  ----------
+  descr : tuple
+      Description of the array returned by share_array.
+  mode : str, optional
+      Mode of opening a memory-mapped file, by default 'r+'.
+  shm : SharedMemory, optional
+      Already attached shared memory, by default None.
+
+  Returns
+  -------
+  array : array
+      Shared array.
+  shm : SharedMemory
+      Shared memory to close after use 
+      (None for memory-mapped files).
+  """
+  from multiprocessing import shared_memory
+  kind, name, dtype, shape, offset = descr
+  if kind == 'memmap':
+    return np.memmap(name, dtype=dtype, mode=mode, shape=shape, offset=offset), None
+  shm = shared_memory.SharedMemory(name=name) if shm is None else shm
+  return np.ndarray(shape, dtype=dtype, buffer=shm.buf), shm
+def share_array(A, copy=True):
+  """
+  Share an array between processes without pickling it.
+
+  Parameters
+  ----------
+  A : array
+      Array to share. If it is a whole (not sliced) 
+      np.memmap, its file is shared. Otherwise it
+      is placed in shared memory.
+  copy : bool, optional
+      If True (default), copy A into shared memory.
+
+  Returns
+  -------
+  descr : tuple
+      Picklable description of the array, see attach_array.
+  shm : SharedMemory
+      Shared memory to close and unlink after use
+      (None for memory-mapped files).
+  """
+  from multiprocessing import shared_memory
+  if isinstance(A, np.memmap) and isinstance(A.base, mmap.mmap) \
+    and A.flags.c_contiguous and A.filename is not None:
+    return ('memmap', A.filename, A.dtype.str, A.shape, A.offset), None
+  shm = shared_memory.SharedMemory(create=True, size=max(1, A.nbytes))
+  if copy:
+    np.ndarray(A.shape, dtype=A.dtype, buffer=shm.buf)[...] = A
+  return ('shm', shm.name, A.dtype.str, A.shape, 0), shm
+def _apply_shared(pipeline, src, dst, b, scale):
+  """
+  Apply pipeline to a chunk b of a shared array,
+  in a worker process.
+  """
+  A, A_shm = attach_array(src, mode='r')
+  out, out_shm = attach_array(dst)
+  pipeline._apply(A[b], out[b], scale)
+  if isinstance(out, np.memmap):
+    out.flush()
+  del A, out
+  for shm in [A_shm, out_shm]:
+    if shm is not None:
+      shm.close()
 
 
 # alternative
@@ -243,6 +613,8 @@ class ArrModifier:
         Modifiers are allowed to have *args and **kwargs
         so lambda functions are not recommended as 
         modifiers.
+      n_workers, executor, chunk_size, out
+        See modify_array.
     
     Returns
     -------
@@ -254,18 +626,7 @@ class ArrModifier:
     is the last dimension of the array.
     
     """
-    array_modifiers = _set_array_modifiers(**kwargs)
-    tracewise_modifiers = _set_tracewise_modifiers(**kwargs)
-
-    A = np.array(self.arr)
-
-    for func in array_modifiers:
-      A = func(A, *args, **kwargs)
-
-    for func in tracewise_modifiers:
-      A = np.apply_along_axis(func, -1, A, *args, **kwargs)
-    
-    return A
+    return modify_array(self.arr, *args, **kwargs)
   def _set_array_modifiers(**kwargs):
     """
     Notes
@@ -329,10 +690,6 @@ class ArrModifier:
     Clipping is done before normalization.
     
     """
-    from fullwavepy.numeric.generic import normalize
-    from fullwavepy.numeric.operators import derivative
-    from fullwavepy.numeric.fourier import dft
-    
     modifiers = kwargs.get('tracewise_modifiers', [])
     norm = kwargs.get('norm', None)
     spect = kwargs.get('spect', None)
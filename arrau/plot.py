@@ -1,13 +1,303 @@
 """
 Plotting API. Currently the only 'backend' is 
 the `plotea` package.
+
+It is imported on first use (not with arrau),
+so that arrays can be processed without 
+matplotlib or a display.
 """
-# import matplotlib.pyplot as plt # for interlace only
+import importlib
+import os
 import numpy as np
-# from plotea.ipyvolume import Ipv
-from plotea.mpl2d import Imshow, Shade, Wiggle,\
-  PltPlot, figax # np.ones(drainage.mg.shape)
+from arrau.generic import CoordTransform
+from arrau.modify import attach_array, share_array
+
+def backend(name, module='plotea.mpl2d'):
+  """
+  Get a plotter of the backend,
+  importing it on first call.
+
+  Parameters
+  ----------
+  name : str
+      E.g. 'Imshow'.
+  module : str, optional
+      Backend module, by default 'plotea.mpl2d'.
+  """
+  return getattr(importlib.import_module(module), name)
+def decimate(A, decimation='mean'):
+  """
+  Halve both dimensions of a 2d array.
 
+  Parameters
+  ----------
+  A : array
+      2d array.
+  decimation : str, optional
+      'stride' - every other sample,
+      'mean' (default) - mean of each 2x2 block,
+      'minmax' - the sample of each 2x2 block 
+      deviating most from its mean, so that spikes
+      (min/max) are kept, not smoothed out 
+      like with 'mean' or skipped like with 'stride'.
+
+  Returns
+  -------
+  array
+      Of shape ceil(n / 2) along each axis.
+  """
+  A = np.asarray(A)
+  if decimation == 'stride':
+    return A[::2, ::2]
+  # odd dimensions are padded by repeating the last row / column
+  pad = [(0, n % 2) for n in A.shape]
+  if any(p for _, p in pad):
+    A = np.pad(A, pad, mode='edge')
+  n1, n2 = A.shape[0] // 2, A.shape[1] // 2
+  blocks = A.reshape(n1, 2, n2, 2).swapaxes(1, 2).reshape(n1, n2, 4)
+  mean = blocks.mean(axis=-1, keepdims=True)
+  if decimation == 'mean':
+    return mean[..., 0].astype(A.dtype, copy=False)
+  elif decimation == 'minmax':
+    i = np.abs(blocks - mean).argmax(axis=-1)
+    return np.take_along_axis(blocks, i[..., None], axis=-1)[..., 0]
+  else:
+    raise ValueError('Unknown decimation: %s' % decimation)
+
+def wiggle(A, x=None, t=None, ax=None, scale=1., clip=1., fill=True, color='k', 
+  fill_color='k', lw=.5, resolution=None, **kwargs):
+  """
+  Plot traces as wiggles, all at once.
+
+  All trace polylines are one LineCollection and 
+  their positive lobes one PolyCollection, built from
+  a single vertex array. Traces are decimated to 
+  the resolution of the axes: at most one trace per 
+  pixel column and, along traces, the min and max
+  of the samples falling into each pixel row.
+
+  Parameters
+  ----------
+  A : array
+      2d array of traces, A[i] is the i-th trace.
+  x : array, optional
+      Positions of traces, by default their indices.
+  t : array, optional
+      Times (depths) of samples, by default their indices.
+  ax : Axes, optional
+      By default the current axes.
+  scale : float, optional
+      Max. amplitude in units of trace spacing, by default 1.
+  clip : float, optional
+      Clip amplitudes at clip trace spacings, by default 1.
+  fill : bool, optional
+      Fill positive lobes, by default True.
+  color, fill_color : str, optional
+      Colours of lines and fill, by default 'k'.
+  lw : float, optional
+      Line width, by default .5.
+  resolution : tuple, optional
+      (width, height) in pixels to decimate to,
+      by default that of the axes.
+  xlabel, ylabel : str, optional
+      Axis labels.
+  vertical_axis_up : bool, optional
+      By default False, i.e. t increases downwards.
+
+  Returns
+  -------
+  lines : LineCollection
+  polys : PolyCollection
+      None if fill is False.
+  """
+  collections = importlib.import_module('matplotlib.collections')
+  A = np.asarray(A)
+  ntr, ns = A.shape
+  x = np.arange(ntr) if x is None else np.asarray(x, dtype=float)
+  t = np.arange(ns) if t is None else np.asarray(t, dtype=float)
+  ax = backend('gca', 'matplotlib.pyplot')() if ax is None else ax
+  if resolution is None:
+    bbox = ax.get_window_extent()
+    resolution = (bbox.width, bbox.height)
+  width, height = [max(1, int(i)) for i in resolution]
+  amax = np.max(np.abs(A))
+  # decimate traces
+  step = -(-ntr // width)
+  A, x = A[::step], x[::step]
+  # spacing of the traces drawn
+  dx = np.median(np.diff(x)) if len(x) > 1 else 1.
+  factor = scale * dx / amax if amax > 0 else 0.
+  # decimate samples to (min, max) per pixel row
+  b = -(-ns // height)
+  if b > 1:
+    nb = -(-ns // b)
+    blocks = np.pad(A, [(0, 0), (0, nb * b - ns)], mode='edge').reshape(len(A), nb, b)
+    A = np.stack([blocks.min(axis=-1), blocks.max(axis=-1)], axis=-1).reshape(len(A), -1)
+    t = np.stack([t[::b], t[np.minimum(np.arange(nb) * b + b - 1, ns - 1)]], 
+      axis=-1).ravel()
+  amp = np.clip(A * factor, -clip * dx, clip * dx)
+  verts = np.empty(amp.shape + (2,))
+  verts[..., 0] = x[:, None] + amp
+  verts[..., 1] = t
+  lines = collections.LineCollection(verts, colors=color, linewidths=lw)
+  ax.add_collection(lines)
+  polys = None
+  if fill:
+    # positive lobes closed at the trace baseline
+    pverts = np.empty((len(amp), amp.shape[1] + 2, 2))
+    pverts[:, 1:-1, 0] = x[:, None] + np.maximum(amp, 0)
+    pverts[:, 1:-1, 1] = t
+    pverts[:, [0, -1], 0] = x[:, None]
+    pverts[:, [0, -1], 1] = t[[0, -1]]
+    polys = collections.PolyCollection(pverts, facecolors=fill_color, 
+      edgecolors='none')
+    ax.add_collection(polys)
+  ax.set_xlim(x[0] - clip * dx, x[-1] + clip * dx)
+  if kwargs.get('vertical_axis_up', False):
+    ax.set_ylim(t[0], t[-1])
+  else:
+    ax.set_ylim(t[-1], t[0])
+  if kwargs.get('xlabel', None) is not None:
+    ax.set_xlabel(kwargs['xlabel'])
+  if kwargs.get('ylabel', None) is not None:
+    ax.set_ylabel(kwargs['ylabel'])
+  return lines, polys
+def render_slices(arr, slices, fname='frame%04d.png', unit='index', vmin=None, 
+  vmax=None, figsize=(6.4, 4.8), dpi=100, fps=10, n_workers=None, 
+  executor='process', **kwargs):
+  """
+  Render slices of a 3d array to image files
+  in parallel, without pyplot (Agg canvas).
+
+  Parameters
+  ----------
+  arr : Arr3d
+      Array to slice. If its data is a np.memmap, 
+      worker processes open the file, otherwise
+      it is copied into shared memory once.
+  slices : list
+      List of (axis, value) pairs.
+  fname : str, optional
+      File name pattern of numbered frames, 
+      by default 'frame%04d.png', or a single
+      file (without '%') to save an animation
+      to with Pillow, e.g. 'slices.gif'.
+  unit : str, optional
+      Unit of values, see Arr.slice. By default 'index'.
+  vmin, vmax : float, optional
+      Colour scale shared by all frames, by default 
+      from the array statistics (see Arr.stats and
+      kwargs percentile, symmetric of Arr2dPlot.plot).
+  figsize : tuple, optional
+      In inches, by default (6.4, 4.8).
+  dpi : float, optional
+      By default 100.
+  fps : float, optional
+      Frame rate of the animation, by default 10.
+  n_workers : int, optional
+      By default the number of CPUs.
+  executor : str / Executor, optional
+      'process' (default), 'thread' or 
+      an instance of concurrent.futures.Executor.
+  **kwargs
+      Passed to imshow, e.g. cmap.
+
+  Returns
+  -------
+  list
+      Files written.
+  """
+  from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+  A = arr.arr if isinstance(arr.arr, np.ndarray) else np.asarray(arr.arr)
+  kwargs = _get_clim(arr, vmin=vmin, vmax=vmax, **kwargs)
+  kwargs['interpolation'] = kwargs.get('interpolation', 'nearest')
+  animate = '%' not in fname
+  tasks = []
+  for i, (axis, value) in enumerate(slices):
+    index = int(arr._get_slice_index(value, unit, axis))
+    arr._check_slice_index(index, axis)
+    h, v = [j for j in range(3) if j != axis]
+    extent = list(arr.axes[h].extent) + list(arr.axes[v].extent)
+    pos = CoordTransform().index2metre(index, arr.axes[axis].extent[0], 
+      arr.axes[axis].dx if arr.axes[axis].dx is not None else 1)
+    title = '%s = %g m' % (arr.axes[axis].param, pos)
+    labels = ['%s (m)' % arr.axes[j].param.upper() for j in [h, v]]
+    tasks.append(dict(axis=axis, index=index, extent=extent, title=title, 
+      labels=labels, fname=None if animate else fname % i))
+  if isinstance(executor, Executor):
+    pool = executor
+  else:
+    pool = {'thread': ThreadPoolExecutor, 'process': ProcessPoolExecutor}[executor]\
+      (n_workers or os.cpu_count())
+  descr, shm = share_array(A) if isinstance(pool, ProcessPoolExecutor) else (A, None)
+  try:
+    futures = [pool.submit(_render_slice, descr, figsize, dpi, kwargs, **task) \
+      for task in tasks]
+    frames = [f.result() for f in futures]
+  finally:
+    if pool is not executor:
+      pool.shutdown()
+    if shm is not None:
+      shm.close()
+      shm.unlink()
+  if not animate:
+    return [task['fname'] for task in tasks]
+  Image = importlib.import_module('PIL.Image')
+  images = [Image.fromarray(frame) for frame in frames]
+  images[0].save(fname, save_all=True, append_images=images[1:], 
+    duration=1000. / fps, loop=0)
+  return [fname]
+def _imshow_slice(ax, data, extent, z_down=True, **kwargs):
+  """
+  Plot a slice of a 3d array (horizontal 
+  axis first) with z axis pointing down.
+  """
+  im = ax.imshow(data.T, extent=extent, origin='lower', aspect='auto', **kwargs)
+  if z_down:
+    ax.invert_yaxis()
+  return im
+def _get_clim(arr, **kwargs):
+  """
+  Set vmin and vmax in kwargs (unless provided)
+  based on statistics of arr (see Arr.stats).
+  Kwargs percentile and symmetric are
+  consumed, see ArrStats.clim.
+  """
+  percentile = kwargs.pop('percentile', None)
+  symmetric = kwargs.pop('symmetric', False)
+  if kwargs.get('vmin', None) is None or kwargs.get('vmax', None) is None:
+    vmin, vmax = arr.stats().clim(percentile, symmetric)
+    kwargs['vmin'] = vmin if kwargs.get('vmin', None) is None else kwargs['vmin']
+    kwargs['vmax'] = vmax if kwargs.get('vmax', None) is None else kwargs['vmax']
+  return kwargs
+def _render_slice(descr, figsize, dpi, kwargs, axis, index, extent, title, labels, 
+  fname=None):
+  """
+  Render a slice of a shared array (see share_array)
+  in a worker, to a file or to an RGBA array.
+  """
+  from matplotlib.figure import Figure
+  from matplotlib.backends.backend_agg import FigureCanvasAgg
+  if isinstance(descr, np.ndarray):
+    A, shm = descr, None
+  else:
+    A, shm = attach_array(descr, mode='r')
+  data = np.array(A[(slice(None),) * axis + (index,)])
+  del A
+  if shm is not None:
+    shm.close()
+  fig = Figure(figsize=figsize, dpi=dpi)
+  canvas = FigureCanvasAgg(fig)
+  ax = fig.subplots()
+  _imshow_slice(ax, data, extent, z_down=axis != 2, **kwargs)
+  ax.set_title(title)
+  ax.set_xlabel(labels[0])
+  ax.set_ylabel(labels[1])
+  if fname is not None:
+    fig.savefig(fname)
+    return fname
+  canvas.draw()
+  return np.asarray(canvas.buffer_rgba()).copy()
 class Arr1dPlot:
   def plot(self, mode='plt', **kwargs):
     self._set_xaxis()
@@ -18,7 +308,7 @@ class Arr1dPlot:
   # -----------------------------------------------------------------------------    
   def _plt_plot(self, **kwargs):
     kwargs['xaxis'] = kwargs.get('xaxis', self.xaxis)
-    PltPlot().plot(self.arr, **kwargs)
+    backend('PltPlot')().plot(self.arr, **kwargs)
   def _set_xaxis(self):
     axis = self.axes[0]
     x1, x2 = axis.extent
@@ -47,8 +337,35 @@ class Arr2dPlot:
     mode : str
         'imshow' / 'contour' / 'contourf' / 'im+cr' / 'shade'
         Default: 'imshow'.
+    lod : bool / int
+        Level of detail (see pyramid) to plot: 
+        True (default) picks the coarsest level with at 
+        least as many samples as pixels of the figure,
+        an int picks a given level, False plots
+        the full resolution. Not used by 'wiggle'.
+    decimation : str
+        See decimate, by default 'mean'.
+    figsize : tuple
+        Figure size in inches, by default 
+        that of the current figure.
+    dpi : float
+        By default that of the current figure.
+    vmin, vmax : float
+        Colour limits, by default from statistics
+        of the array (see Arr.stats).
+    percentile : float
+        Clip colour limits at percentiles, e.g. 99 
+        means 1st and 99th, by default None (min, max).
+    symmetric : bool
+        Make default colour limits symmetric around 0,
+        by default False.
     """
     kwargs = self._get_formatting_for_plot(**kwargs)
+    if mode != 'wiggle':
+      kwargs = _get_clim(self, **kwargs)
+    self._plot_arr = self._get_lod(kwargs.pop('lod', True), 
+      kwargs.pop('decimation', 'mean'), kwargs.get('figsize', None), 
+      kwargs.pop('dpi', None)) if mode != 'wiggle' else self.arr
     # framework
     if mode == 'imshow' or mode == 'im':
       self._imshow(**kwargs)
@@ -64,13 +381,28 @@ class Arr2dPlot:
       self._wiggle(**kwargs)
     else:
       raise ValueError('Wrong mode: %s' % mode)
+  def pyramid(self, decimation='mean'):
+    """
+    Multi-resolution pyramid of the array.
+
+    Level 0 is the array itself, each next level
+    halves both dimensions of the previous one
+    (see decimate). Levels are computed on demand 
+    (see _get_lod) and cached until the data changes.
+
+    Returns
+    -------
+    list
+        Levels computed so far.
+    """
+    return self.data_cache.setdefault(('pyramid', decimation), [self.arr])
   # -----------------------------------------------------------------------------  
   def _contour(self, **kwargs):
     kwargs['extent'] = self._get_extent_for_contour()
-    Contour().plot(self.arr, **kwargs)
+    backend('Contour')().plot(self._plot_arr, **kwargs)
   def _contourf(self, **kwargs):
     kwargs['extent'] = self._get_extent_for_contour()
-    Contourf().plot(self.arr, **kwargs)    
+    backend('Contourf')().plot(self._plot_arr, **kwargs)    
   def _get_axis_labels(self, **kwargs):
     kwargs['xlabel'] = kwargs.get('xlabel', self.axes[0].label)
     kwargs['ylabel'] = kwargs.get('ylabel', self.axes[1].label)
@@ -114,24 +446,67 @@ class Arr2dPlot:
   def _get_formatting_for_plot(self, **kwargs):
     kwargs = self._get_axis_labels(**kwargs)
     return kwargs  
+  def _get_lod(self, lod=True, decimation='mean', figsize=None, dpi=None):
+    """
+    Get a level of the pyramid.
+
+    Parameters
+    ----------
+    See plot.
+
+    Returns
+    -------
+    array
+        Level of detail.
+    """
+    levels = self.pyramid(decimation)
+    if lod is False:
+      return self.arr
+    elif lod is True:
+      # axes[0] is plotted horizontally
+      target = np.maximum(1, self._get_figure_pixels(figsize, dpi))
+      fits = lambda A: max(A.shape) > 1 and \
+        all(-(-n // 2) >= t for n, t in zip(A.shape, target))
+      k = 0
+      while fits(levels[k]):
+        if k + 1 == len(levels):
+          levels.append(decimate(levels[k], decimation))
+        k += 1
+      return levels[k]
+    for k in range(len(levels), lod + 1):
+      levels.append(decimate(levels[k - 1], decimation))
+    return levels[lod]
+  def _get_figure_pixels(self, figsize=None, dpi=None):
+    if figsize is None or dpi is None:
+      fig = backend('gcf', 'matplotlib.pyplot')()
+      figsize = fig.get_size_inches() if figsize is None else figsize
+      dpi = fig.dpi if dpi is None else dpi
+    return np.asarray(figsize) * dpi
   def _imshow(self, **kwargs):
     kwargs['extent'] = self._get_extent_for_imshow()
-    Imshow().plot(self.arr, **kwargs)
+    backend('Imshow')().plot(self._plot_arr, **kwargs)
   def _imshow_plus_contour(self, **kwargs):
     self._imshow(**kwargs)
     kwargs['invert_vertical_axis'] = False
     self._contour(**kwargs)
   def _shade(self, **kwargs):
     kwargs['extent'] = self._get_extent_for_imshow()
-    Shade().plot(self.arr, **kwargs)
+    backend('Shade')().plot(self._plot_arr, **kwargs)
   def _wiggle(self, **kwargs):
-    Wiggle().plot(self.arr, **kwargs) 
+    x = np.linspace(*self.axes[0].extent, self.shape[0])
+    t = np.linspace(*self.axes[1].extent, self.shape[1])
+    wiggle(self.arr, x=x, t=t, **kwargs)
 class Arr2dSlicePlot:
   def plot(self, **kwargs):
     self.arr.plot(**kwargs)
 class Arr3dPlot:
+  def viewer(self, *args, **kwargs):
+    """
+    Create an interactive viewer, see Arr3dViewer.
+    """
+    return Arr3dViewer(self, *args, **kwargs)
   def volshow(self, **kwargs):
-    return Ipv.volshow(self.arr, **kwargs)
+    return backend('Ipv', 'plotea.ipyvolume').volshow(self.arr, **kwargs)
   def plot_interface(self, **kwargs):
     """
     Framework plotter.
@@ -175,19 +550,171 @@ class Arr3dPlot:
       self.plot_3slices(**kwargs)
     else:
       raise ValueError('Wrong value of nslices: %s' %str(nslices))
-    return plt.gca()
+    return backend('gca', 'matplotlib.pyplot')()
   def plot(self, *args, **kwargs):
+    # colour limits of the whole array, not the slice
+    kwargs = _get_clim(self, **kwargs)
     self.slice(*args, **kwargs)
     self.slices.list[-1].plot(**kwargs)
   def plot_3slices(self, x, y, z, unit='m', **kwargs):
+    kwargs = _get_clim(self, **kwargs)
     self.slice(x, axis=0, unit=unit)
     self.slice(y, axis=1, unit=unit)
     self.slice(z, axis=2, unit=unit)
     linecolor = kwargs.get('linecolor', 'k')
     for sl in self.slices.list:
-      fig, ax = figax()
+      fig, ax = backend('figax')()
       sl.plot(**kwargs)
       sl.plot_slice_lines(color=linecolor)
+class Arr3dViewer:
+  """
+  Interactive viewer of three orthogonal 
+  slices through a 3d array.
+
+  Panels (images and slice lines) are created
+  once, then update() only replaces the data of 
+  images whose slice changed and moves the lines,
+  redrawing just these artists (blitting) if
+  the backend supports it. E.g. in a notebook:
+
+  >>> v = a.viewer()
+  >>> ipywidgets.interact(v.update, x=(0, a.shape[0]-1), 
+  ...   y=(0, a.shape[1]-1), z=(0, a.shape[2]-1))
+  """
+  def __init__(self, arr, x=None, y=None, z=None, unit='index', fig=None, 
+    blit=True, linecolor='k', **kwargs):
+    """
+    Parameters
+    ----------
+    arr : Arr3d
+        Array to view.
+    x, y, z : float, optional
+        Initial slices, by default through the centre.
+    unit : str, optional
+        Unit of x, y, z, see Arr.slice. By default 'index'.
+    fig : Figure, optional
+        By default a new pyplot figure.
+    blit : bool, optional
+        Use blitting if supported, by default True.
+    linecolor : str, optional
+        Colour of slice lines, by default 'k'.
+    **kwargs
+        Passed to imshow, e.g. cmap, vmin, vmax
+        (by default from Arr.stats, see also kwargs
+        percentile and symmetric of Arr2dPlot.plot).
+    """
+    self.unit = unit
+    if fig is None:
+      fig = backend('figure', 'matplotlib.pyplot')(figsize=(15, 4))
+    self.fig = fig
+    self.canvas = fig.canvas
+    self.blit = blit and getattr(self.canvas, 'supports_blit', False)
+    self.axs = fig.subplots(1, 3)
+    self.clim_kwargs = dict(percentile=kwargs.pop('percentile', None),
+      symmetric=kwargs.pop('symmetric', False))
+    self.kwargs = kwargs
+    self.arr = arr
+    self.images = []
+    self.lines = []
+    self.backgrounds = None
+    n = arr.shape
+    values = [n[i] // 2 if v is None else v for i, v in enumerate([x, y, z])]
+    units = [unit if v is not None else 'index' for v in [x, y, z]]
+    self.indices = [int(arr._get_slice_index(v, u, i)) \
+      for i, (v, u) in enumerate(zip(values, units))]
+    self._create_panels(linecolor)
+    if self.blit:
+      self._cid = self.canvas.mpl_connect('draw_event', self._on_draw)
+    self.canvas.draw()
+  def set_arr(self, arr):
+    """
+    Replace the viewed array (of the same number
+    of dimensions), e.g. with the next iteration
+    of a model, keeping the slices.
+    """
+    self.arr = arr
+    self.indices = [min(i, n - 1) for i, n in zip(self.indices, arr.shape)]
+    vmin, vmax = self._get_clim()
+    for axis, im in enumerate(self.images):
+      im.set_data(self._get_slice(axis).T)
+      im.set_extent(self._get_extent(axis))
+      im.set_clim(vmin, vmax)
+    self._move_lines()
+    self.canvas.draw_idle()
+  def update(self, x=None, y=None, z=None, unit=None):
+    """
+    Move the slices. Coordinates not 
+    provided are left unchanged.
+    """
+    unit = self.unit if unit is None else unit
+    changed = []
+    for axis, v in enumerate([x, y, z]):
+      if v is None:
+        continue
+      i = int(self.arr._get_slice_index(v, unit, axis))
+      self.arr._check_slice_index(i, axis)
+      if i != self.indices[axis]:
+        self.indices[axis] = i
+        self.images[axis].set_data(self._get_slice(axis).T)
+        changed.append(axis)
+    if changed:
+      self._move_lines()
+      self._redraw()
+  # -----------------------------------------------------------------------------
+  def _create_panels(self, linecolor):
+    vmin, vmax = self._get_clim()
+    kwargs = dict(self.kwargs)
+    kwargs['vmin'], kwargs['vmax'] = vmin, vmax
+    # resampling is the bulk of the redraw time
+    kwargs['interpolation'] = kwargs.get('interpolation', 'nearest')
+    for axis, ax in enumerate(self.axs):
+      h, v = [i for i in range(3) if i != axis]
+      im = _imshow_slice(ax, self._get_slice(axis), self._get_extent(axis), 
+        z_down=axis != 2, animated=self.blit, **kwargs)
+      ax.set_xlabel('%s (m)' % self.arr.axes[h].param.upper())
+      ax.set_ylabel('%s (m)' % self.arr.axes[v].param.upper())
+      vline = ax.axvline(0, color=linecolor, linestyle='--', lw=1, animated=self.blit)
+      hline = ax.axhline(0, color=linecolor, linestyle='--', lw=1, animated=self.blit)
+      self.images.append(im)
+      self.lines.append((vline, hline))
+    self._move_lines()
+  def _get_clim(self):
+    kwargs = _get_clim(self.arr, vmin=self.kwargs.get('vmin', None), 
+      vmax=self.kwargs.get('vmax', None), **self.clim_kwargs)
+    return kwargs['vmin'], kwargs['vmax']
+  def _get_extent(self, axis):
+    h, v = [i for i in range(3) if i != axis]
+    return list(self.arr.axes[h].extent) + list(self.arr.axes[v].extent)
+  def _get_position(self, axis):
+    ax = self.arr.axes[axis]
+    dx = ax.dx if ax.dx is not None else 1
+    return CoordTransform().index2metre(self.indices[axis], ax.extent[0], dx)
+  def _get_slice(self, axis):
+    return self.arr._slice_array(self.indices[axis], axis)
+  def _move_lines(self):
+    for axis, (vline, hline) in enumerate(self.lines):
+      h, v = [i for i in range(3) if i != axis]
+      x, y = self._get_position(h), self._get_position(v)
+      vline.set_xdata([x, x])
+      hline.set_ydata([y, y])
+  def _on_draw(self, event):
+    self.backgrounds = [self.canvas.copy_from_bbox(ax.bbox) for ax in self.axs]
+    self._draw_artists()
+  def _draw_artists(self):
+    for ax, im, lines in zip(self.axs, self.images, self.lines):
+      ax.draw_artist(im)
+      for line in lines:
+        ax.draw_artist(line)
+  def _redraw(self):
+    if not self.blit or self.backgrounds is None:
+      self.canvas.draw_idle()
+      return
+    for background in self.backgrounds:
+      self.canvas.restore_region(background)
+    self._draw_artists()
+    for ax in self.axs:
+      self.canvas.blit(ax.bbox)
+    self.canvas.flush_events()
 class Arr3dSlicePlot:
   def plot(self, **kwargs):
     # Allow to overwrite the default to prevent multiple flipping
@@ -195,9 +722,18 @@ class Arr3dSlicePlot:
     kwargs['vertical_axis_up'] = kwargs.get('vertical_axis_up', \
       self.vertical_axis_up)
     self.arr.plot(**kwargs)
-  def plot_slice_lines(self, color='k', linestyle='--', lw=1):
-    vlines = self._get_slice_lines(is_vertical=True)
-    hlines = self._get_slice_lines(is_vertical=False)
-    for line in vlines + hlines:
-      PltPlot().plot(line.ordinates, xaxis=line.abscissas,\
-        color=color, linestyle=linestyle, lw=lw)
+  def plot_slice_lines(self, color='k', linestyle='--', lw=1, ax=None):
+    """
+    Mark the other slices with lines,
+    drawn as a single LineCollection.
+
+    Returns
+    -------
+    LineCollection
+    """
+    collections = importlib.import_module('matplotlib.collections')
+    ax = backend('gca', 'matplotlib.pyplot')() if ax is None else ax
+    lines = collections.LineCollection(self._get_slice_segments(), colors=color,
+      linestyles=linestyle, linewidths=lw)
+    ax.add_collection(lines)
+    return lines
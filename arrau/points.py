@@ -1,60 +1,194 @@
+"""
+Point sets, e.g. sources and receivers.
+"""
+import numpy as np
+from arrau.plot import backend
 
 class Points:
-  def __init__(self, points):
-    self.all = points
+  ndim = None
+  def __init__(self, points, meta=None, **columns):
+    """
+    Parameters
+    ----------
+    points : array / list / dict
+        Coordinates of shape (N, ndim), or
+        dict {name: coordinates} in which case
+        names are stored in metadata column 'name'.
+    meta : structured array, optional
+        Metadata of N points.
+    **columns
+        Metadata columns of length N,
+        e.g. id=ids, kind=kinds.
+    """
+    if isinstance(points, dict):
+      columns['name'] = list(points.keys())
+      points = list(points.values())
+    self.all = np.array(points, dtype=float, ndmin=2)
+    if np.size(self.all) == 0:
+      self.all = self.all.reshape(0, self.ndim or 0)
+    self.meta = self._get_meta(meta, **columns)
+  def __getitem__(self, key):
+    """
+    Subset of points (by index, slice,
+    indices or boolean mask).
+    """
+    key = [key] if np.ndim(key) == 0 and not isinstance(key, slice) else key
+    meta = None if self.meta is None else self.meta[key]
+    return self.__class__(self.all[key], meta=meta)
+  def __len__(self):
+    return len(self.all)
+  def filter(self, mask=None, box=None, **criteria):
+    """
+    Select points.
+
+    Parameters
+    ----------
+    mask : array, optional
+        Boolean mask of points to select.
+    box : list, optional
+        [[x1, x2], [y1, y2], ...] to select points within.
+    **criteria
+        Values of metadata columns, a single value
+        or a list of accepted ones, e.g. kind='receiver'.
+
+    Returns
+    -------
+    Points
+        Selected points (and their metadata).
+
+    Raises
+    ------
+    ValueError
+        If a criterion is not a metadata column.
+    """
+    keep = np.ones(len(self), dtype=bool) if mask is None else np.asarray(mask)
+    if box is not None:
+      box = np.asarray(box, dtype=float)
+      keep = keep & np.all((self.all >= box[:, 0]) & (self.all <= box[:, 1]), axis=1)
+    names = () if self.meta is None else self.meta.dtype.names
+    for key, value in criteria.items():
+      if key not in names:
+        raise ValueError('No metadata column %s to filter by, columns: %s' % \
+          (key, list(names)))
+      keep = keep & np.isin(self.meta[key], value)
+    return self[keep]
+  # -----------------------------------------------------------------------------
+  def _get_meta(self, meta=None, **columns):
+    if columns:
+      assert meta is None
+      meta = np.rec.fromarrays([np.asarray(c) for c in columns.values()],
+        names=list(columns.keys()))
+    if meta is not None:
+      assert len(meta) == len(self.all)
+    return meta
 class Points3d(Points):
+  ndim = 3
   def __init__(self, *args, **kwargs):
     super().__init__(*args, **kwargs)
-    for pt in self.all: # checking if it's really (x,y,z)
-        assert np.array(pt).shape == (3,) 
-  def slice(self, slice_at='y', **kwargs):
-    if slice_at == 'x':
-      i1, i2 = 1, 2
-    elif slice_at == 'y':
-      i1, i2 = 0, 2
-    elif slice_at == 'z':
-      i1, i2 = 0, 1
-    else:
-      raise ValueError('Wrong slice coord: %s' % slice_at)
-    self.sliced = []
-    for i, elem in enumerate(self.all):
-      #assert len(val) == 3 # IT CAN HAVE METADATA
-      self.sliced.append(np.array([elem[i1], elem[i2]]))
+    # checking if it's really (x,y,z)
+    assert self.all.ndim == 2 and self.all.shape[1] == 3
+  @property
+  def x(self):
+    return self.all[:, 0]
+  @property
+  def y(self):
+    return self.all[:, 1]
+  @property
+  def z(self):
+    return self.all[:, 2]
+  def slice(self, slice_at='y', value=None, tol=None, **kwargs):
+    """
+    Project points onto a plane.
+
+    Parameters
+    ----------
+    slice_at : str, optional
+        Axis normal to the plane: 'x', 'y' (default) or 'z'.
+    value : float, optional
+        Position of the plane along slice_at. If given
+        together with tol, only points within tol of it
+        are kept.
+    tol : float, optional
+        See value.
+
+    Returns
+    -------
+    array
+        Projected coordinates of shape (N, 2),
+        also stored as self.sliced.
+    """
+    i1, i2 = self._get_plane_axes(slice_at)
+    mask = self._get_plane_mask(slice_at, value, tol)
+    pts = self.all if mask is None else self.all[mask]
+    self.sliced = pts[:, [i1, i2]]
     return self.sliced
   def plot_slice(self, ax=None, **kwargs):
     """
+    Plot points projected onto a plane (see slice)
+    with a single call to ax.plot.
+
+    Parameters
+    ----------
+    ax : Axes, optional
+        By default the current axes.
+    annotate : bool, optional
+        Annotate points with names (metadata
+        column 'name') or indices, by default False.
+    **kwargs
+        Passed to slice, and marker formatting
+        (alpha, marker, markersize, markeredgecolor,
+        markerfacecolor).
     """
-    annotate = kw('annotate', False, kwargs)
-    annoffset = kw('annoffset', 0, kwargs)
-    alpha = kw('alpha', 0.7, kwargs)
-    marker = kw('marker', '.', kwargs)
-    markersize = kw('markersize', 5, kwargs)
-    markeredgecolor = kw('markeredgecolor', 'k', kwargs)
-    markerfacecolor = kw('markerfacecolor', 'none', kwargs) # EMPTY MARKERS
+    annotate = kwargs.get('annotate', False)
+    annoffset = kwargs.get('annoffset', 0)
+    alpha = kwargs.get('alpha', 0.7)
+    marker = kwargs.get('marker', '.')
+    markersize = kwargs.get('markersize', 5)
+    markeredgecolor = kwargs.get('markeredgecolor', 'k')
+    markerfacecolor = kwargs.get('markerfacecolor', 'none') # EMPTY MARKERS
     if ax is None:
-      ax = plt.gca()
+      ax = backend('gca', 'matplotlib.pyplot')()
 
-    self.slice(**kwargs)
+    sliced = self.slice(**kwargs)
 
-    if annotate: 
-      for key, val in self.items():
+    if annotate:
+      names = self.meta['name'] if self.meta is not None and \
+        'name' in self.meta.dtype.names else np.arange(len(self))
+      mask = self._get_plane_mask(kwargs.get('slice_at', 'y'), 
+        kwargs.get('value', None), kwargs.get('tol', None))
+      names = names if mask is None else names[mask]
+      for key, val in zip(names, sliced):
         ax.annotate(key, (val[0]+annoffset, val[1]+annoffset), clip_on=True) # clip_on IS REQUIRED
 
-    ax.plot([i[0] for i in self.sliced], [i[1] for i in self.sliced], 
-        '.',
-        alpha=alpha, 
-        marker=marker, 
-        markersize=markersize, 
+    return ax.plot(sliced[:, 0], sliced[:, 1],
+        linestyle='none',
+        alpha=alpha,
+        marker=marker,
+        markersize=markersize,
         markeredgecolor=markeredgecolor,
         markerfacecolor=markerfacecolor,
          )
   def plot_3slices(self, fig, **kwargs): # LEGACY
-    d = self.read(**dict(kwargs, unit='node'))
     s3 = kwargs.get('slice', 'y') #FIXME: THIS MUST BE MERGED WITH arr3d
     s1, s2 = [i for i in ['x', 'y', 'z'] if i != s3]
     s = [s1, s2, s3]
 
     for i in range(3):
-      self.plot_slice(s[i], fig.axes[i])
+      self.plot_slice(fig.axes[i], slice_at=s[i])
   def plot(self, *args, **kwargs):
-    self.plot_slice(*args, **kwargs)
\ No newline at end of file
+    self.plot_slice(*args, **kwargs)
+  # -----------------------------------------------------------------------------
+  def _get_plane_mask(self, slice_at, value=None, tol=None):
+    if value is None or tol is None:
+      return None
+    return np.abs(self.all[:, 'xyz'.index(slice_at)] - value) <= tol
+  def _get_plane_axes(self, slice_at):
+    if slice_at == 'x':
+      i1, i2 = 1, 2
+    elif slice_at == 'y':
+      i1, i2 = 0, 2
+    elif slice_at == 'z':
+      i1, i2 = 0, 1
+    else:
+      raise ValueError('Wrong slice coord: %s' % slice_at)
+    return i1, i2
@@ -0,0 +1,427 @@
+"""
+Native SEG-Y (rev. 1) I/O.
+
+Traces are memory-mapped, not read, so that
+files larger than memory can be sliced cheaply.
+IBM floats are converted lazily, only for
+the traces accessed.
+"""
+import numpy as np
+from autologging import logged
+
+TEXT_HEADER_SIZE = 3200
+BINARY_HEADER_SIZE = 400
+TRACE_HEADER_SIZE = 240
+
+# (1-based byte, format) as in the SEG-Y rev. 1 standard,
+# binary-header bytes counted from its start (i.e. 3201st byte of the file)
+BINARY_HEADER = {
+  'job_id': (1, '>i4'),
+  'line_number': (5, '>i4'),
+  'reel_number': (9, '>i4'),
+  'traces_per_ensemble': (13, '>i2'),
+  'dt': (17, '>i2'),
+  'ns': (21, '>i2'),
+  'sample_format': (25, '>i2'),
+  'ensemble_fold': (27, '>i2'),
+  'sorting_code': (29, '>i2'),
+  'measurement_system': (55, '>i2'),
+  'revision': (301, '>u2'),
+  'fixed_length': (303, '>i2'),
+  'n_extended_headers': (305, '>i2'),
+}
+TRACE_HEADER = {
+  'trace_sequence_line': (1, '>i4'),
+  'trace_sequence_file': (5, '>i4'),
+  'ffid': (9, '>i4'),
+  'trace_number': (13, '>i4'),
+  'source_number': (17, '>i4'),
+  'cdp': (21, '>i4'),
+  'cdp_trace': (25, '>i4'),
+  'trace_id': (29, '>i2'),
+  'offset': (37, '>i4'),
+  'receiver_elevation': (41, '>i4'),
+  'source_elevation': (45, '>i4'),
+  'source_depth': (49, '>i4'),
+  'scalar_elevation': (69, '>i2'),
+  'scalar_coord': (71, '>i2'),
+  'source_x': (73, '>i4'),
+  'source_y': (77, '>i4'),
+  'group_x': (81, '>i4'),
+  'group_y': (85, '>i4'),
+  'coord_units': (89, '>i2'),
+  'delay': (109, '>i2'),
+  'ns': (115, '>i2'),
+  'dt': (117, '>i2'),
+  'cdp_x': (181, '>i4'),
+  'cdp_y': (185, '>i4'),
+  'inline': (189, '>i4'),
+  'crossline': (193, '>i4'),
+  'shotpoint': (197, '>i4'),
+}
+# sample format code: dtype (IBM floats are read as raw uint32)
+SAMPLE_FORMATS = {1: '>u4', 2: '>i4', 3: '>i2', 5: '>f4', 8: 'i1'}
+
+def ibm2ieee(raw):
+  """
+  Convert IBM floats to IEEE floats.
+
+  Parameters
+  ----------
+  raw : array
+      IBM floats stored as (big-endian) uint32.
+
+  Returns
+  -------
+  array
+      np.float32 array of the same shape.
+  """
+  raw = np.asarray(raw).astype(np.uint32)
+  sign = np.where(raw >> 31, -1., 1.)
+  exponent = ((raw >> 24) & 0x7f).astype(np.int32)
+  mantissa = (raw & 0x00ffffff).astype(np.float64)
+  return (sign * np.ldexp(mantissa, 4 * (exponent - 64) - 24)).astype(np.float32)
+def ieee2ibm(x):
+  """
+  Convert IEEE floats to IBM floats.
+
+  Parameters
+  ----------
+  x : array
+      Floats.
+
+  Returns
+  -------
+  array
+      IBM floats stored as np.uint32 array
+      of the same shape. Values beyond the IBM
+      range are clipped to it, too small ones
+      become 0.
+  """
+  x = np.asarray(x, dtype=np.float64)
+  sign = (x < 0).astype(np.uint32) << 31
+  m, e = np.frexp(np.abs(x))
+  # |x| = f * 16**E, 1/16 <= f < 1
+  E = -(-e // 4)
+  mantissa = np.round(np.ldexp(m, e - 4 * E + 24)).astype(np.int64)
+  overflow = mantissa >= 2**24
+  mantissa = np.where(overflow, mantissa >> 4, mantissa)
+  exponent = E + overflow + 64
+  too_big = exponent > 127
+  mantissa = np.where(too_big, 2**24 - 1, mantissa)
+  exponent = np.where(too_big, 127, exponent)
+  ibm = sign | (exponent.astype(np.uint32) << 24) | mantissa.astype(np.uint32)
+  return np.where((m == 0) | (exponent < 0), np.uint32(0), ibm).astype(np.uint32)
+def read_segy(fname, geometry=None, **kwargs):
+  """
+  Read traces of a SEG-Y file as a memory-mapped array.
+
+  Parameters
+  ----------
+  fname : str
+      SEG-Y file.
+  geometry : tuple, optional
+      Pair of trace-header keys, e.g. ('inline', 'crossline'),
+      to reshape traces into a 3d array, see SegyFile.data.
+      By default None, i.e. 2d array (trace, sample).
+
+  Returns
+  -------
+  array
+      np.memmap or IbmFloatArray (for IBM floats).
+  """
+  return SegyFile(fname).data(geometry)
+def write_segy(A, fname, dt=1000, sample_format=5, text=None, chunk_size=1024,
+  **kwargs):
+  """
+  Write a 2d (trace, sample) or 3d (inline, crossline,
+  sample) array to a SEG-Y file, chunk by chunk.
+
+  Parameters
+  ----------
+  A : array / Arr
+      Array, possibly memory-mapped.
+  fname : str
+      Output file.
+  dt : int, optional
+      Sample interval in microseconds, by default 1000.
+  sample_format : int, optional
+      5 (IEEE float, default) or 1 (IBM float).
+  text : str, optional
+      Textual header, see SegyWriter.
+  chunk_size : int, optional
+      Number of traces written at once, by default 1024.
+  """
+  A = getattr(A, 'arr', A)
+  ns = A.shape[-1]
+  traces = A.reshape((-1, ns))
+  with SegyWriter(fname, ns, dt=dt, sample_format=sample_format, text=text) as w:
+    for i in range(0, len(traces), chunk_size):
+      chunk = traces[i : i + chunk_size]
+      headers = {}
+      if A.ndim == 3:
+        il, xl = np.unravel_index(np.arange(i, i + len(chunk)), A.shape[:2])
+        headers = dict(inline=il + 1, crossline=xl + 1)
+      w.write(chunk, **headers)
+def trace_dtype(ns, sample_format=5):
+  """
+  Structured dtype of a SEG-Y trace.
+
+  Parameters
+  ----------
+  ns : int
+      Number of samples.
+  sample_format : int
+      See SAMPLE_FORMATS.
+
+  Returns
+  -------
+  np.dtype
+      Fields: 'header' (structured, see TRACE_HEADER)
+      and 'data'.
+  """
+  header = np.dtype({'names': list(TRACE_HEADER),
+    'formats': [f for _, f in TRACE_HEADER.values()],
+    'offsets': [b - 1 for b, _ in TRACE_HEADER.values()],
+    'itemsize': TRACE_HEADER_SIZE})
+  return np.dtype([('header', header),
+    ('data', SAMPLE_FORMATS[sample_format], (ns,))])
+class IbmFloatArray:
+  """
+  Array-like view of IBM floats converted
+  to np.float32 only when accessed.
+  """
+  def __init__(self, raw):
+    """
+    Parameters
+    ----------
+    raw : array
+        IBM floats as uint32 (e.g. memory-mapped).
+    """
+    self.raw = raw
+    self.shape = raw.shape
+    self.ndim = raw.ndim
+    self.size = raw.size
+    self.dtype = np.dtype(np.float32)
+  def __array__(self, dtype=None, copy=None):
+    """
+    Convert everything, chunk by chunk.
+    """
+    out = np.empty(self.shape, self.dtype)
+    if self.ndim == 0:
+      out[...] = ibm2ieee(self.raw)
+    else:
+      step = max(1, 2**20 // max(1, self.raw[0].size))
+      for i in range(0, self.shape[0], step):
+        out[i : i + step] = ibm2ieee(self.raw[i : i + step])
+    return out if dtype is None else out.astype(dtype)
+  def __getitem__(self, key):
+    return ibm2ieee(self.raw[key])
+  def __len__(self):
+    return len(self.raw)
+  def reshape(self, *shape):
+    return IbmFloatArray(self.raw.reshape(*shape))
+@logged
+class SegyFile:
+  """
+  SEG-Y file with fixed-length traces,
+  memory-mapped.
+  """
+  def __init__(self, fname, mode='r'):
+    """
+    Parameters
+    ----------
+    fname : str
+        SEG-Y file.
+    mode : str, optional
+        See np.memmap, by default 'r'.
+    """
+    self.fname = fname
+    with open(fname, 'rb') as f:
+      self.text = self._decode_text(f.read(TEXT_HEADER_SIZE))
+      raw = f.read(BINARY_HEADER_SIZE)
+    self.binary_header = self._parse(raw, BINARY_HEADER)
+    self.ns = int(self.binary_header['ns'])
+    self.dt = int(self.binary_header['dt'])
+    self.sample_format = int(self.binary_header['sample_format'])
+    if self.sample_format not in SAMPLE_FORMATS:
+      raise ValueError('Unsupported sample format: %s' % self.sample_format)
+    n_ext = max(0, int(self.binary_header['n_extended_headers']))
+    offset = TEXT_HEADER_SIZE + BINARY_HEADER_SIZE + n_ext * TEXT_HEADER_SIZE
+    self.traces = np.memmap(fname, dtype=self.trace_dtype(), mode=mode,
+      offset=offset)
+    self._indices = {}
+  def data(self, geometry=None):
+    """
+    Trace samples.
+
+    Parameters
+    ----------
+    geometry : tuple, optional
+        Pair of trace-header keys, e.g. ('inline', 'crossline'),
+        to reshape traces into a 3d array. Traces must be
+        sorted by them and form a full rectangular grid.
+        By default None, i.e. 2d array (trace, sample).
+
+    Returns
+    -------
+    array
+        np.memmap or IbmFloatArray (for IBM floats),
+        a view of the file.
+    """
+    data = self.traces['data']
+    if geometry is not None:
+      n1 = len(np.unique(self.header(geometry[0])))
+      n2 = len(np.unique(self.header(geometry[1])))
+      if n1 * n2 != len(data):
+        raise ValueError('Traces do not form a %sx%s grid.' % (n1, n2))
+      data = data.reshape((n1, n2, self.ns))
+    if self.sample_format == 1:
+      data = IbmFloatArray(data)
+    return data
+  def header(self, key):
+    """
+    Values of a trace-header field for all traces.
+
+    Parameters
+    ----------
+    key : str
+        See TRACE_HEADER.
+
+    Returns
+    -------
+    array
+    """
+    return np.asarray(self.traces['header'][key])
+  def index(self, key):
+    """
+    Index of traces by a trace-header field,
+    created once and cached.
+
+    Parameters
+    ----------
+    key : str
+        E.g. 'inline', 'crossline', 'offset'.
+
+    Returns
+    -------
+    dict
+        Trace numbers (array) for each value of key.
+    """
+    if key not in self._indices:
+      values = self.header(key)
+      order = np.argsort(values, kind='stable')
+      uniq, starts = np.unique(values[order], return_index=True)
+      self._indices[key] = dict(zip(uniq.tolist(), np.split(order, starts[1:])))
+    return self._indices[key]
+  def read(self, **criteria):
+    """
+    Read selected traces only.
+
+    Parameters
+    ----------
+    **criteria
+        Trace-header values, e.g. inline=10, offset=200.
+
+    Returns
+    -------
+    array
+        2d array (trace, sample) of np.float32
+        (or other type of samples).
+    """
+    inds = self.select(**criteria)
+    raw = self.traces['data'][inds]
+    return ibm2ieee(raw) if self.sample_format == 1 else np.asarray(raw)
+  def select(self, **criteria):
+    """
+    Find traces matching all criteria, see read.
+
+    Returns
+    -------
+    array
+        Sorted trace numbers.
+    """
+    inds = None
+    for key, value in criteria.items():
+      found = self.index(key).get(value, np.array([], dtype=int))
+      inds = found if inds is None else np.intersect1d(inds, found)
+    return np.arange(len(self.traces)) if inds is None else np.sort(inds)
+  def trace_dtype(self):
+    return trace_dtype(self.ns, self.sample_format)
+  # -----------------------------------------------------------------------------
+  def _decode_text(self, raw):
+    # EBCDIC text headers start with 'C' (0xC3)
+    encoding = 'cp500' if raw[:1] == b'\xc3' else 'ascii'
+    return raw.decode(encoding, errors='replace')
+  def _parse(self, raw, fields):
+    return {k: np.frombuffer(raw, dtype=f, count=1, offset=b-1)[0] \
+      for k, (b, f) in fields.items()}
+@logged
+class SegyWriter:
+  """
+  Streaming SEG-Y writer: headers are written
+  on opening, traces can be appended in chunks.
+  """
+  def __init__(self, fname, ns, dt=1000, sample_format=5, text=None):
+    """
+    Parameters
+    ----------
+    fname : str
+        Output file.
+    ns : int
+        Number of samples per trace.
+    dt : int, optional
+        Sample interval in microseconds, by default 1000.
+    sample_format : int, optional
+        5 (IEEE float, default) or 1 (IBM float).
+    text : str, optional
+        Textual header (up to 3200 ASCII characters).
+    """
+    if sample_format not in [1, 5]:
+      raise ValueError('Unsupported sample format: %s' % sample_format)
+    self.ns = ns
+    self.dt = dt
+    self.sample_format = sample_format
+    self.ntraces = 0
+    self.dtype = trace_dtype(ns, sample_format)
+    self.file = open(fname, 'wb')
+    text = 'C 1 written by arrau' if text is None else text
+    self.file.write(text.encode('ascii').ljust(TEXT_HEADER_SIZE)[:TEXT_HEADER_SIZE])
+    binary = np.zeros(BINARY_HEADER_SIZE, dtype=np.uint8)
+    for key, value in dict(dt=dt, ns=ns, sample_format=sample_format,
+      revision=0x0100, fixed_length=1).items():
+      b, f = BINARY_HEADER[key]
+      binary[b - 1 : b - 1 + np.dtype(f).itemsize] = \
+        np.array([value], dtype=f).view(np.uint8)
+    self.file.write(binary.tobytes())
+  def __enter__(self):
+    return self
+  def __exit__(self, *args):
+    self.close()
+  def close(self):
+    self.file.close()
+  def write(self, data, **headers):
+    """
+    Append traces.
+
+    Parameters
+    ----------
+    data : array
+        2d array (trace, sample).
+    **headers
+        Trace-header values (scalars or arrays),
+        see TRACE_HEADER. Trace sequence numbers,
+        ns and dt are set automatically.
+    """
+    data = np.asarray(data)
+    traces = np.zeros(len(data), dtype=self.dtype)
+    seq = np.arange(self.ntraces + 1, self.ntraces + len(data) + 1)
+    traces['header']['trace_sequence_line'] = seq
+    traces['header']['trace_sequence_file'] = seq
+    traces['header']['ns'] = self.ns
+    traces['header']['dt'] = self.dt
+    for key, value in headers.items():
+      traces['header'][key] = value
+    traces['data'] = ieee2ibm(data) if self.sample_format == 1 else data
+    self.file.write(traces.tobytes())
+    self.ntraces += len(data)
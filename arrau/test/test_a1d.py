@@ -14,7 +14,6 @@ class TestArr1d(TestCase):
     assert len(a.axes) == 1
     assert a.axes[0].param == 'x'
     assert a.axes[0].unit == 'm' 
-  @skip
   def test_info(self):
     a = Arr1d(np.zeros(5))
     a.info()
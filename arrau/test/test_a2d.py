@@ -1,6 +1,7 @@
 import numpy as np
 from unittest import TestCase, skip
 from arrau.a2d import Arr2d, Arr2dSlice
+from arrau.plot import decimate, wiggle
 
 class TestArr2d(TestCase):
   def test_extract(self):
@@ -29,3 +30,59 @@ class TestArr2d(TestCase):
     a.slice(0, axis=0)
     assert len(a.slices.list) == 1
     assert isinstance(a.slices.list[0], Arr2dSlice)
+  def test_slices_at(self):
+    a = Arr2d(np.array([[0,1],[2,3]]))
+    stack, slices = a.slices_at(np.array([1, 0]), axis=1)
+    assert np.all(stack.arr == [[1,3],[0,2]])
+    assert np.all(slices[0].arr == [1,3])
+  def test_interlace(self):
+    a = Arr2d(np.zeros((4,2)), extent=[[0,3],[0,1]])
+    b = a.interlace(Arr2d(np.ones((4,2))), chunk_size=1)
+    assert isinstance(b, Arr2d)
+    assert np.all(b.arr[:,0] == [0,1,0,1])
+    assert np.all(b.axes[0].extent == [0,3])
+  def test_stats_cached(self):
+    a = Arr2d(np.arange(6.).reshape(2,3))
+    s = a.stats()
+    assert a.stats() is s
+    assert s.max == 5
+    a.modify(norm='max')
+    assert a.stats() is not s
+    assert a.stats().max == 1
+  def test_decimate(self):
+    A = np.array([[0,1,2],[3,4,5],[6,7,20]], dtype=float)
+    assert np.all(decimate(A, 'stride') == [[0,2],[6,20]])
+    assert np.all(decimate(A, 'mean') == [[2,3.5],[6.5,20]])
+    assert np.all(decimate(A, 'minmax') == [[0,2],[6,20]])
+  def test_lod(self):
+    a = Arr2d(np.random.rand(1000,300))
+    assert a._get_lod(figsize=(4,3), dpi=100).shape == (1000,300)
+    assert a._get_lod(figsize=(4,1.5), dpi=100).shape == (500,150)
+    assert a._get_lod(figsize=(2,.5), dpi=100).shape == (250,75)
+    assert len(a.pyramid()) == 3
+    assert a._get_lod(lod=False) is a.arr
+    assert a._get_lod(lod=4, decimation='stride').shape == (63,19)
+    a.arr = np.zeros((10,10))
+    assert len(a.pyramid()) == 1
+  def test_wiggle(self):
+    from matplotlib.figure import Figure
+    ax = Figure().subplots()
+    A = np.random.randn(2000, 1000)
+    lines, polys = wiggle(A, ax=ax, t=np.linspace(0, 1, 1000), resolution=(200, 100))
+    assert len(lines.get_segments()) == 200
+    assert len(lines.get_segments()[0]) == 200
+    assert np.all(polys.get_paths()[0].vertices[:, 0] >= 0)
+    assert ax.get_ylim() == (1, 0)
+  def test_wiggle_decimated_spacing(self):
+    from matplotlib.figure import Figure
+    ax = Figure().subplots()
+    A = np.zeros((1000, 50))
+    A[:, 10] = 1.
+    lines, _ = wiggle(A, ax=ax, scale=.5, fill=False, resolution=(100, 50))
+    segs = lines.get_segments()
+    assert len(segs) == 100
+    # traces drawn every 10, max. amplitude of half of it
+    spacing = segs[1][0, 0] - segs[0][0, 0]
+    assert spacing == 10
+    assert np.isclose(np.max(segs[0][:, 0] - segs[0][0, 0]), .5 * spacing)
+    assert ax.get_xlim() == (-10, 1000)
@@ -1,6 +1,11 @@
+import os
 import numpy as np
+from tempfile import TemporaryDirectory
 from unittest import TestCase
 from arrau.a3d import Arr3d
+from arrau.generic import Arr
+from arrau.io import save_mmp
+from arrau.plot import render_slices
 
 class TestArr3d(TestCase):
   """
@@ -28,3 +33,161 @@ class TestArr3d(TestCase):
     assert np.all(a.slice(0, axis=0).axes[0].extent == [0,2])
     assert np.all(a.slice(0, axis=0).axes[1].extent == [0,3])
     assert np.all(a.slice(0, axis=2).axes[0].extent == [0,1])
+  def test_extract_view(self):
+    a = Arr3d(np.zeros((4,4,4)), extent=[[1,4],[1,4],[1,4]])
+    b = a.extract([[1,4],[1,2],[1,2]])
+    assert np.shares_memory(a.arr, b.arr)
+    b = a.extract([[1,4],[1,2],[1,2]], copy=True)
+    assert not np.shares_memory(a.arr, b.arr)
+  def test_extract_memmap(self):
+    with TemporaryDirectory() as tmp:
+      fname = os.path.join(tmp, 'a.mmp')
+      m = np.memmap(fname, dtype=np.float32, mode='w+', shape=(4,4,4))
+      a = Arr3d(m, extent=[[1,4],[1,4],[1,4]])
+      b = a.extract([[1,4],[1,3],[1,3]]).extract([[1,2],[1,2],[1,2]])
+      assert isinstance(b.arr, np.memmap)
+      assert b.shape == (2,2,2)
+      del m, a, b
+  def test_slice_view(self):
+    a = Arr3d(np.zeros((2,3,4)))
+    assert np.shares_memory(a.slice(1, axis=2).arr, a.arr)
+  def test_slice_cache(self):
+    a = Arr3d(np.zeros((2,3,4)))
+    a.slice(1, axis=2)
+    a.slice(1, axis=2)
+    assert a.slice_cache.hits == 1
+    assert a.slice_cache.misses == 1
+    a.arr = np.ones((2,3,4))
+    assert len(a.slice_cache) == 0
+    assert np.all(a.slice(1, axis=2).arr == 1)
+  def test_slices_add(self):
+    a = Arr3d(np.zeros((4,4,4)))
+    a.slice(2, axis=0)
+    a.slice(1, axis=0)
+    a.slice(1, axis=1)
+    a.slice(2, axis=0)
+    assert len(a.slices) == 3
+    assert a.slices.list[-1].value == 2
+    assert np.all(a.slices.values[0] == [1,2])
+    assert np.all(a.slices.list[0].vvals == [1])
+  def test_slices_nearest(self):
+    a = Arr3d(np.zeros((4,4,4)))
+    a.slice(0, axis=2)
+    a.slice(3, axis=2)
+    assert a.slices.nearest(1.2, axis=2).value == 0
+    assert a.slices.nearest(2.9, axis=2).value == 3
+    assert a.slices.nearest(0, axis=0) is None
+  def test_slices_max(self):
+    a = Arr3d(np.zeros((4,4,4)), max_slices=2)
+    for i in range(4):
+      a.slice(i, axis=1)
+    assert len(a.slices) == 2
+    assert np.all(a.slices.values[1] == [2,3])
+  def test_slices_at(self):
+    a = Arr3d(np.arange(24).reshape((2,3,4)), extent=[[0,1],[0,2],[0,300]])
+    stack, slices = a.slices_at([0, 100, 200], unit='m', axis=2)
+    assert isinstance(stack, Arr3d)
+    assert stack.shape == (3,2,3)
+    assert np.all(stack.axes[0].extent == [0, 200])
+    assert np.all(stack.values == [0, 100, 200])
+    assert np.all(stack.axes[2].extent == [0, 2])
+    assert len(slices) == 3
+    assert np.all(slices[1].arr == a.slice(1, axis=2).arr)
+    assert np.shares_memory(slices[1].arr, stack.arr)
+  def test_slices_at_uneven(self):
+    a = Arr3d(np.arange(24).reshape((2,3,4)), extent=[[0,1],[0,2],[0,300]])
+    for values in [[0, 200, 300], [200, 0, 100]]:
+      stack, slices = a.slices_at(values, unit='m', axis=2)
+      assert stack.axes[0].param == 'slice'
+      assert np.all(stack.axes[0].extent == [0, 2])
+      assert np.all(stack.values == values)
+      assert np.all(slices[0].arr == a.slice(values[0] // 100, axis=2).arr)
+  def test_slices_at_out_of_bounds(self):
+    a = Arr3d(np.zeros((2,3,4)))
+    with self.assertRaises(IndexError):
+      a.slices_at([0, 4], axis=2)
+  def test_modify_memmap(self):
+    with TemporaryDirectory() as tmp:
+      fname = os.path.join(tmp, 'a.mmp')
+      m = np.memmap(fname, dtype=np.float32, mode='w+', shape=(4,4,4))
+      m[:] = np.random.randn(4,4,4)
+      a = Arr3d(np.memmap(fname, dtype=np.float32, mode='r', shape=(4,4,4)))
+      a.normalise(chunk_size=3)
+      assert isinstance(a.arr, np.memmap)
+      assert np.allclose(np.max(np.abs(a.arr), axis=-1), 1)
+      # array modifiers need the whole array in memory
+      a = Arr3d(np.memmap(fname, dtype=np.float32, mode='r', shape=(4,4,4)))
+      a.modify(array_modifiers=[lambda A, *args, **kwargs: A - A.mean()])
+      assert np.isclose(a.arr.mean(), 0, atol=1e-6)
+      del m, a
+  def test_open(self):
+    with TemporaryDirectory() as tmp:
+      fname = os.path.join(tmp, 'a.mmp')
+      save_mmp(np.zeros((2,3,4), dtype=np.float32), fname, extent=[[0,1],[0,2],[0,3]])
+      a = Arr.open(fname)
+      assert isinstance(a, Arr3d)
+      assert isinstance(a.arr, np.memmap)
+      assert np.all(a.axes[2].extent == [0,3])
+      del a
+      a = Arr.open(fname, extent=[[0,10],[0,20],[0,30]])
+      assert np.all(a.axes[2].extent == [0,30])
+      del a
+  def test_open_legacy(self):
+    with TemporaryDirectory() as tmp:
+      fname = os.path.join(tmp, 'a.mmp')
+      np.zeros((2,3,4), dtype=np.float32).tofile(fname)
+      a = Arr3d.open(fname, shape=(2,3,4), extent=[[0,1],[0,2],[0,3]])
+      assert a.shape == (2,3,4)
+      assert np.all(a.axes[1].extent == [0,2])
+      del a
+  def test_slice_lines(self):
+    from matplotlib.figure import Figure
+    a = Arr3d(np.zeros((3,4,5)), extent=[[0,20],[0,30],[0,40]])
+    a.slice(1, axis=1)
+    sl = a.slices.get(1, axis=1)
+    a.slice(2, axis=0)
+    a.slice(0, axis=0)
+    a.slice(3, axis=2)
+    segments = sl._get_slice_segments()
+    assert np.all(segments == [[[0,0],[0,40]], [[2,0],[2,40]], [[0,3],[20,3]]])
+    assert sl._get_slice_segments() is segments
+    a.slice(1, axis=2)
+    assert len(sl._get_slice_segments()) == 4
+    lines = sl.plot_slice_lines(ax=Figure().subplots())
+    assert len(lines.get_segments()) == 4
+    hlines = sl._get_slice_lines(is_vertical=False)
+    assert np.all(hlines[0].ordinates == [1,1])
+  def test_viewer(self):
+    from matplotlib.figure import Figure
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+    fig = Figure()
+    FigureCanvasAgg(fig)
+    A = np.random.rand(5,6,7)
+    a = Arr3d(A, extent=[[0,40],[0,50],[0,60]])
+    v = a.viewer(fig=fig)
+    assert v.blit
+    assert v.indices == [2,3,3]
+    im = v.images[0]
+    v.update(x=20, unit='m')
+    assert v.images[0] is im
+    assert v.indices[0] == 2
+    v.update(x=4)
+    assert np.all(im.get_array() == A[4].T)
+    assert v.lines[1][0].get_xdata()[0] == 40
+    v.set_arr(Arr3d(np.zeros((3,6,7))))
+    assert v.indices[0] == 2
+    assert np.all(im.get_array() == 0)
+  def test_render_slices(self):
+    from PIL import Image
+    A = np.random.rand(5,6,7).astype(np.float32)
+    with TemporaryDirectory() as tmp:
+      save_mmp(A, os.path.join(tmp, 'a.mmp'))
+      a = Arr.open(os.path.join(tmp, 'a.mmp'))
+      fnames = render_slices(a, [(0, 1), (2, 6)], os.path.join(tmp, 'f%02d.png'), 
+        figsize=(2,2), dpi=50, n_workers=2)
+      assert fnames == [os.path.join(tmp, 'f%02d.png' % i) for i in range(2)]
+      assert Image.open(fnames[1]).size == (100, 100)
+      fnames = render_slices(a, [(1, 0), (1, 1), (1, 2)], os.path.join(tmp, 'a.gif'),
+        figsize=(2,2), dpi=50, executor='thread')
+      assert Image.open(fnames[0]).n_frames == 3
+      del a
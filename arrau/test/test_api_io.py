@@ -1,6 +1,16 @@
+import json
+import os
+import threading
+import time
 import numpy as np
-from unittest import TestCase
-from arrau.io import extent2str, shape2str
+from tempfile import TemporaryDirectory
+from unittest import TestCase, mock
+from importlib.metadata import EntryPoint
+from arrau.generic import Arr, ArrAxis
+from arrau.io import extent2str, shape2str, str2shape, FileCollection, \
+  FileReader, FormatRegistry, mmp_is_valid, read_any_format, read_mmp, \
+  read_mmp_axes, read_mmp_meta, read_txt, read_txt_axes, save_mmp, \
+  update_mmp_source, write_any_format
 
 class TestFunctions(TestCase):
   def test_extent2str(self):
@@ -10,4 +20,211 @@ class TestFunctions(TestCase):
   def test_shape2str(self):
     assert shape2str((1,2,3)) == 'shape1x2x3'
     assert shape2str((1,2)) == 'shape1x2'
-    assert shape2str((1,)) == 'shape1'
\ No newline at end of file
+    assert shape2str((1,)) == 'shape1'
+  def test_str2shape(self):
+    assert str2shape('p14-StartVp_shape341x361x81.mmp') == (341,361,81)
+    assert str2shape('a.mmp') is None
+class TestMemmap(TestCase):
+  def test_save_read(self):
+    with TemporaryDirectory() as tmp:
+      fname = os.path.join(tmp, 'a.mmp')
+      A = np.arange(24, dtype='>f4').reshape((2,3,4))
+      save_mmp(A, fname, extent=[[0,1],[0,2],[0,3]])
+      B = read_mmp(fname)
+      assert isinstance(B, np.memmap)
+      assert B.dtype == A.dtype
+      assert np.all(B == A)
+      axes = read_mmp_axes(fname)
+      assert np.all(axes[2].extent == [0,3])
+      assert axes[2].shape == 4
+      del B
+  def test_save_axes(self):
+    with TemporaryDirectory() as tmp:
+      fname = os.path.join(tmp, 'a.mmp')
+      save_mmp(np.zeros(3), fname, axes=[ArrAxis('t', 3, unit='s', extent=[0,1])])
+      ax = read_mmp_axes(fname)[0]
+      assert ax.param == 't'
+      assert ax.unit == 's'
+  def test_read_any_cached(self):
+    with TemporaryDirectory() as tmp:
+      source = os.path.join(tmp, 'a.dat')
+      fname = os.path.join(tmp, 'a.mmp')
+      with open(source, 'wb') as f:
+        f.write(b'abc')
+      save_mmp(np.ones(3), fname, source=source)
+      assert mmp_is_valid(fname, source)
+      # parsing a.dat would fail, so the cache must be used
+      assert np.all(FileReader.read_any(source) == 1)
+  def test_cache_invalidation(self):
+    with TemporaryDirectory() as tmp:
+      source = os.path.join(tmp, 'a.dat')
+      fname = os.path.join(tmp, 'a.mmp')
+      with open(source, 'wb') as f:
+        f.write(b'abc')
+      save_mmp(np.ones(3), fname, source=source)
+      # touched only
+      os.utime(source, (time.time() + 10, time.time() + 10))
+      meta = json.dumps(read_mmp_meta(fname))
+      assert mmp_is_valid(fname, source)
+      # validation doesn't write
+      assert json.dumps(read_mmp_meta(fname)) == meta
+      update_mmp_source(fname, source)
+      assert read_mmp_meta(fname)['source']['mtime'] == os.stat(source).st_mtime
+      with open(source, 'wb') as f:
+        f.write(b'abd')
+      os.utime(source, (time.time() + 20, time.time() + 20))
+      assert not mmp_is_valid(fname, source)
+  def test_cache_other_source(self):
+    with TemporaryDirectory() as tmp:
+      fname = os.path.join(tmp, 'a.mmp')
+      for ext in ['dat', 'bin']:
+        with open(os.path.join(tmp, 'a.' + ext), 'wb') as f:
+          f.write(b'abc')
+      save_mmp(np.ones(3), fname, source=os.path.join(tmp, 'a.dat'))
+      assert mmp_is_valid(fname, os.path.join(tmp, 'a.dat'))
+      assert not mmp_is_valid(fname, os.path.join(tmp, 'a.bin'))
+class TestFormatRegistry(TestCase):
+  def test_builtin(self):
+    with TemporaryDirectory() as tmp:
+      A = np.arange(6, dtype=np.float32).reshape((2,3))
+      for ext in ['npy', 'mmp']:
+        fname = os.path.join(tmp, 'a.' + ext)
+        write_any_format(A, fname)
+        B = read_any_format(fname)
+        assert np.all(A == B)
+        del B
+      fname = os.path.join(tmp, 'a.bin')
+      write_any_format(A, fname)
+      B = read_any_format(fname, shape=(2,3))
+      assert np.all(A == B)
+      del B
+  def test_magic(self):
+    with TemporaryDirectory() as tmp:
+      fname = os.path.join(tmp, 'a.xyz')
+      with open(fname, 'wb') as f:
+        np.save(f, np.ones(3))
+      assert np.all(read_any_format(fname) == 1)
+  def test_unknown(self):
+    with self.assertRaises(ValueError):
+      FormatRegistry().get_reader('a.xyz')
+  def test_lazy(self):
+    r = FormatRegistry()
+    r.register('foo', reader='json:loads')
+    assert isinstance(r._readers['foo'], str)
+    assert r.get_reader('a.FOO').__name__ == 'loads'
+  def test_entry_points(self):
+    ep = EntryPoint(name='foo', value='json:loads', group='arrau.readers')
+    with mock.patch('importlib.metadata.entry_points', 
+      lambda group: [ep] if group == 'arrau.readers' else []):
+      r = FormatRegistry()
+      assert 'foo' in r.extensions()
+      assert r.get_reader('a.foo').__name__ == 'loads'
+class TestTxt(TestCase):
+  def setUp(self):
+    self.tmp = TemporaryDirectory()
+    self.fname = os.path.join(self.tmp.name, 'a.txt')
+    with open(self.fname, 'w') as f:
+      f.write('# extent: 0, 1.5\n# unit: ms\ntime,amp,vel\n')
+      for i in range(4):
+        f.write('%s,%s,%s\n' % (i * 0.5, i, 10 * i))
+  def tearDown(self):
+    self.tmp.cleanup()
+  def test_column(self):
+    a = read_txt(self.fname, columns='amp', delimiter=',', chunk_size=3)
+    assert isinstance(a, np.ndarray)
+    assert np.all(a == [0,1,2,3])
+    axes = read_txt_axes(self.fname, a.shape, delimiter=',')
+    assert np.all(axes[0].extent == [0, 1.5])
+    assert axes[0].unit == 'ms'
+  def test_columns(self):
+    a = read_txt(self.fname, columns=[1, 'vel'], delimiter=',', dtype=np.float32)
+    assert a.shape == (2,4)
+    assert a.dtype == np.float32
+    assert np.all(a[1] == [0,10,20,30])
+  def test_no_header(self):
+    fname = os.path.join(self.tmp.name, 'b.txt')
+    np.savetxt(fname, np.arange(5))
+    a = read_txt(fname)
+    assert np.all(a == np.arange(5))
+    assert np.all(read_txt_axes(fname, a.shape)[0].extent == [0,4])
+  def test_open_cached(self):
+    a = Arr.open(self.fname, columns='amp', delimiter=',')
+    assert isinstance(a.arr, np.memmap)
+    assert np.all(a.axes[0].extent == [0, 1.5])
+    assert a.axes[0].unit == 'ms'
+    assert os.path.exists(os.path.join(self.tmp.name, 'a.mmp'))
+    del a
+  def test_open_shape(self):
+    a = Arr.open(self.fname, columns='amp', delimiter=',', shape=(4,))
+    assert a.arr.shape == (4,)
+    assert np.all(a.axes[0].extent == [0, 1.5])
+    del a
+  def test_open_shape_cached(self):
+    a = Arr.open(self.fname, columns='amp', delimiter=',')
+    del a
+    fname_meta = os.path.join(self.tmp.name, 'a.mmp.json')
+    mtime = os.stat(fname_meta).st_mtime_ns
+    # shape doesn't invalidate the cache
+    a = Arr.open(self.fname, columns='amp', delimiter=',', shape=(4,))
+    assert os.stat(fname_meta).st_mtime_ns == mtime
+    del a
+  def test_open_same_stem(self):
+    a = Arr.open(self.fname, columns='amp', delimiter=',')
+    assert a.axes[0].unit == 'ms'
+    del a
+    # a.mmp is the cache of a.txt, not of a.npy
+    np.save(os.path.join(self.tmp.name, 'a.npy'), np.zeros(3))
+    a = Arr.open(os.path.join(self.tmp.name, 'a.npy'))
+    assert a.axes[0].param == 'x'
+    assert np.all(a.axes[0].extent == [0, 2])
+    del a
+  def test_open_other_columns(self):
+    a = Arr.open(self.fname, columns='amp', delimiter=',')
+    assert np.all(a.arr == [0,1,2,3])
+    del a
+    a = Arr.open(self.fname, columns='vel', delimiter=',')
+    assert np.all(a.arr == [0,10,20,30])
+    del a
+    a = Arr.open(self.fname, columns=['amp', 'vel'], delimiter=',')
+    assert a.arr.shape == (2,4)
+    del a
+class TestFileCollection(TestCase):
+  def setUp(self):
+    self.tmp = TemporaryDirectory()
+    self.arrays = []
+    for i in [1, 2, 10]:
+      A = np.random.rand(4,3,2).astype(np.float32)
+      A.tofile(os.path.join(self.tmp.name, 'p%s-Vp_shape4x3x2.mmp' % i))
+      self.arrays.append(A)
+    self.pattern = os.path.join(self.tmp.name, 'p*-Vp_shape4x3x2.mmp')
+  def tearDown(self):
+    self.tmp.cleanup()
+  def test_natural_order(self):
+    with FileCollection(self.pattern) as C:
+      assert [os.path.basename(f)[:3] for f in C.fnames] == ['p1-', 'p2-', 'p10']
+      assert C.shape == (3,4,3,2)
+  def test_getitem(self):
+    A = np.stack(self.arrays)
+    with FileCollection(self.pattern, prefetch=1, n_workers=1) as C:
+      assert np.all(C[2] == A[2])
+      assert np.all(C[:, 1] == A[:, 1])
+      assert np.all(C[::2, :, 2, 1] == A[::2, :, 2, 1])
+      assert np.all(C[..., 0] == A[..., 0])
+      assert np.all(np.asarray(C) == A)
+      assert len(C.open_all()) == 3
+  def test_getitem_concurrent(self):
+    with FileCollection(self.pattern, prefetch=0, n_workers=3) as C:
+      # all 3 files must be read at the same time
+      barrier = threading.Barrier(3, timeout=5)
+      open_file = C.open
+      def open_waiting(i):
+        barrier.wait()
+        return open_file(i)
+      C.open = open_waiting
+      assert np.all(C[:] == np.stack(self.arrays))
+  def test_prefetch(self):
+    with FileCollection(self.pattern, prefetch=1) as C:
+      for i, A in enumerate(C):
+        assert np.all(A == self.arrays[i])
+        assert i + 1 >= len(C) or i + 1 in C._loaded
+        assert len(C._loaded) <= 2
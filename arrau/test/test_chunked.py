@@ -0,0 +1,63 @@
+import os
+import numpy as np
+from tempfile import TemporaryDirectory
+from unittest import TestCase
+from arrau.a3d import Arr3d
+from arrau.chunked import ChunkedArray, default_chunks, read_chunked, save_chunked
+from arrau.generic import Arr
+
+class TestChunked(TestCase):
+  def setUp(self):
+    self.tmp = TemporaryDirectory()
+    self.A = np.arange(7*6*5, dtype=np.float32).reshape(7,6,5)
+  def tearDown(self):
+    self.tmp.cleanup()
+  def test_roundtrip(self):
+    for name in ['a.chk', 'a.chkz']:
+      fname = os.path.join(self.tmp.name, name)
+      save_chunked(self.A, fname, chunks=(3,4,2))
+      C = read_chunked(fname)
+      assert C.shape == self.A.shape
+      assert np.all(np.asarray(C) == self.A)
+      C.close()
+  def test_getitem(self):
+    fname = os.path.join(self.tmp.name, 'a.chk')
+    save_chunked(self.A, fname, chunks=(3,4,2))
+    C = ChunkedArray(fname)
+    for key in [2, (slice(None), 3), (..., 4), (slice(1,6,2), -1, slice(None,None,-1)),
+      (slice(2,3), [0, 5, 2])]:
+      assert np.all(C[key] == self.A[key])
+    assert np.all(np.take(C, [1, 4], axis=2) == np.take(self.A, [1, 4], axis=2))
+    with self.assertRaises(IndexError):
+      C[7]
+  def test_reads_touched_chunks_only(self):
+    fname = os.path.join(self.tmp.name, 'a.chk')
+    save_chunked(self.A, fname, chunks=(3,4,2))
+    C = ChunkedArray(fname)
+    C[:, :, 0]
+    assert C.cache.misses == 3 * 2
+    C[:, :, 1]
+    assert C.cache.misses == 3 * 2
+    assert C.cache.hits == 3 * 2
+  def test_lz4(self):
+    try:
+      import lz4
+    except ImportError:
+      self.skipTest('lz4 not installed')
+    fname = os.path.join(self.tmp.name, 'a.chk')
+    save_chunked(self.A, fname, compressor='lz4')
+    assert np.all(np.asarray(ChunkedArray(fname)) == self.A)
+  def test_default_chunks(self):
+    assert default_chunks((341, 361, 81), np.float32) == (64, 64, 64)
+    assert default_chunks((1000, 1000, 16), np.float32) == (128, 128, 16)
+    assert default_chunks((10, 10), np.float32) == (10, 10)
+  def test_arr(self):
+    fname = os.path.join(self.tmp.name, 'a.chk')
+    save_chunked(Arr3d(self.A, extent=[[0,60],[0,50],[0,40]]), fname, chunks=(3,4,2))
+    a = Arr.open(fname)
+    assert isinstance(a, Arr3d)
+    assert isinstance(a.arr, ChunkedArray)
+    assert np.all(a.axes[0].extent == [0,60])
+    assert np.all(a.slice(2, axis=1).arr == self.A[:,2])
+    assert np.all(a.extract([[10,30],[0,50],[0,10]]).arr == self.A[1:4,:,:2])
+    assert not os.path.exists(os.path.join(self.tmp.name, 'a.mmp'))
@@ -1,6 +1,10 @@
+import os
+import subprocess
+import sys
 import numpy as np
+from tempfile import TemporaryDirectory
 from unittest import TestCase
-from arrau.generic import ArrAxis, CoordTransform
+from arrau.generic import ArrAxis, ArrSliceCache, ArrStats, CoordTransform
 
 class TestArrAxis(TestCase):
   def test_dx(self):
@@ -14,6 +18,55 @@ class TestArrAxis(TestCase):
   def test_extent_default(self):
     ax = ArrAxis('x', shape=10)
     assert np.all(ax.extent == [0,9])
+class TestArrSliceCache(TestCase):
+  def test_hits_misses(self):
+    c = ArrSliceCache(maxsize=2)
+    assert c.get((0,0)) is None
+    c.put((0,0), np.zeros(2))
+    assert c.get((0,0)) is not None
+    assert c.hits == 1
+    assert c.misses == 1
+  def test_lru(self):
+    c = ArrSliceCache(maxsize=2)
+    c.put((0,0), np.zeros(2))
+    c.put((0,1), np.zeros(2))
+    c.get((0,0))
+    c.put((0,2), np.zeros(2))
+    assert (0,0) in c
+    assert (0,1) not in c
+    assert len(c) == 2
+  def test_disabled(self):
+    c = ArrSliceCache(maxsize=0)
+    c.put((0,0), np.zeros(2))
+    assert len(c) == 0
+class TestArrStats(TestCase):
+  def test_one_pass(self):
+    A = np.random.randn(200, 50) * 10 + np.arange(200)[:, None]
+    A[3, 4] = np.nan
+    s = ArrStats(A, bins=512, block_size=100)
+    B = A[np.isfinite(A)]
+    assert s.count == B.size
+    assert s.min == B.min() and s.max == B.max()
+    assert np.isclose(s.mean, B.mean())
+    assert np.isclose(s.std, B.std())
+    assert s.hist.sum() == B.size
+    tol = 2 * (s.max - s.min) / 512
+    assert np.allclose(s.percentile([1, 50, 99]), np.percentile(B, [1, 50, 99]), atol=tol)
+    assert s.percentile(0) == s.min and s.percentile(100) == s.max
+  def test_hist_max(self):
+    # -7.7 + (1.3 - -7.7) < 1.3
+    s = ArrStats(np.array([-7.7, 1.3]))
+    assert s.hist.sum() == 2
+  def test_clim(self):
+    s = ArrStats(np.linspace(-1, 3, 401))
+    assert s.clim() == (-1, 3)
+    assert s.clim(symmetric=True) == (-3, 3)
+    assert np.allclose(s.clim(99), (-0.96, 2.96), atol=.01)
+  def test_constant(self):
+    s = ArrStats(np.full((3, 3), 5, dtype=np.int16))
+    assert s.clim() == (5, 5)
+    assert s.percentile(50) == 5
+    assert s.std == 0
 class TestCoordTransform(TestCase):
   def test_metre2index(self):
     origin = 0
@@ -22,3 +75,61 @@ class TestCoordTransform(TestCase):
     assert i == 0
     i = CoordTransform().metre2index(26, origin, dx)
     assert i == 1
+  def test_metre2index_array(self):
+    i = CoordTransform().metre2index(np.array([24, 26, 75, 125]), 0, 50)
+    assert np.all(i == [0, 1, 2, 2])
+  def test_metre2index_rounding(self):
+    ct = CoordTransform()
+    m = np.array([24, 26, 75, 0.3])
+    assert np.all(ct.metre2index(m, 0, 50, rounding='round') == [0, 1, 2, 0])
+    assert np.all(ct.metre2index(m, 0, 50, rounding='floor') == [0, 0, 1, 0])
+    assert np.all(ct.metre2index(m, 0, 50, rounding='ceil') == [1, 1, 2, 1])
+    assert ct.metre2index(0.3, 0, 0.1, rounding='floor') == 3
+    with self.assertRaises(ValueError):
+      ct.metre2index(m, 0, 50, rounding='foo')
+  def test_index2metre(self):
+    ct = CoordTransform()
+    assert ct.index2metre(2, 100, 50) == 200
+    assert np.all(ct.index2metre(np.arange(3), 100, 50) == [100, 150, 200])
+    assert np.all(ct.node2metre([1, 2], 100, 50) == [100, 150])
+    assert ct.index2kilometre(2, 100, 50) == 0.2
+  def test_kilometre2index(self):
+    assert np.all(CoordTransform().kilometre2index([0.1, 0.2], 100, 50) == [0, 2])
+  def test_node2index(self):
+    assert np.all(CoordTransform().node2index(np.array([1, 5])) == [0, 4])
+    assert CoordTransform().index2node(0) == 1
+  def test_check_index(self):
+    ct = CoordTransform()
+    assert np.all(ct.index_in_bounds([-1, 0, 4, 5], 5) == [False, True, True, False])
+    ct.check_index(np.arange(5), 5)
+    with self.assertRaises(IndexError):
+      ct.check_index([0, 5], 5)
+  def test_box2inds(self):
+    inds = CoordTransform().box2inds([0, 100, 50, 50], [[0, 200], [0, 100]], [50, 10])
+    assert np.all(inds == [[0, 3], [0, 0]])
+class TestImport(TestCase):
+  def run_python(self, code):
+    root = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    with TemporaryDirectory() as tmp:
+      # stub of plotea to see if it gets imported
+      os.makedirs(os.path.join(tmp, 'plotea'))
+      open(os.path.join(tmp, 'plotea', '__init__.py'), 'w').close()
+      with open(os.path.join(tmp, 'plotea', 'mpl2d.py'), 'w') as f:
+        f.write('def figax(): pass\n')
+      env = dict(os.environ, PYTHONPATH=os.pathsep.join([root, tmp]))
+      out = subprocess.run([sys.executable, '-c', code], capture_output=True, 
+        text=True, cwd=root, env=env)
+    return out
+  def test_headless(self):
+    code = "import sys, arrau; print('plotea' in sys.modules or 'matplotlib' in sys.modules)"
+    out = self.run_python(code)
+    assert out.stdout.strip() == 'False', out.stderr
+  def test_headless_submodules(self):
+    code = "import sys; from arrau import io, segy, chunked, points; " + \
+      "print('plotea' in sys.modules or 'matplotlib' in sys.modules)"
+    out = self.run_python(code)
+    assert out.stdout.strip() == 'False', out.stderr
+  def test_plotea_names(self):
+    code = "import sys, arrau; arrau.figax; print('plotea' in sys.modules)"
+    out = self.run_python(code)
+    assert out.stdout.strip() == 'True', out.stderr
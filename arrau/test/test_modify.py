@@ -1,6 +1,136 @@
-# import numpy as np
-# from unittest import TestCase
-# from arrau.modify import ArrModifier
+import os
+import numpy as np
+from tempfile import TemporaryDirectory
+from importlib.util import find_spec
+from unittest import TestCase, skipIf
+from arrau.modify import modify_array, apply_tracewise, derivative, dft, normalize,\
+  norm_bulk_max, ModifierPipeline, interlace_arrays
 
-# class Test(TestCase):
-#   pass
\ No newline at end of file
+class TestTracewise(TestCase):
+  def test_vectorised_matches_loop(self):
+    A = np.random.rand(3,4,16)
+    for func in [derivative, dft, normalize]:
+      fast = apply_tracewise(func, A)
+      slow = np.apply_along_axis(func, -1, A)
+      assert np.allclose(fast, slow)
+  def test_fallback(self):
+    def double(trace, **kwargs):
+      return 2 * trace
+    A = np.ones((2,3))
+    assert np.all(apply_tracewise(double, A) == 2)
+  def test_modify_array(self):
+    A = np.array([[1., 2., 4.], [0., 0., 0.]])
+    assert np.allclose(modify_array(A, norm='max'), [[.25, .5, 1.], [0, 0, 0]])
+    assert np.allclose(modify_array(A, deriv=1), [[1., 1.5, 2.], [0, 0, 0]])
+    assert modify_array(A, spect=True).shape == (2,2)
+class TestReferenceTrace(TestCase):
+  """
+  Semantics of the built-in modifiers on a reference 
+  trace, as of the fullwavepy ones they replaced.
+  """
+  trace = np.array([0., 1., 4., 9., 16., 25.])
+  def test_derivative(self):
+    # central differences, one-sided at the edges
+    assert np.allclose(derivative(self.trace), [1, 2, 4, 6, 8, 9])
+    assert np.allclose(derivative(self.trace, deriv=2), [1, 1.5, 2, 2, 1.5, 1])
+    assert derivative(self.trace).shape == self.trace.shape
+  def test_dft(self):
+    # amplitudes of non-negative frequencies only
+    assert dft(self.trace).shape == (4,)
+    assert dft(np.ones(7)).shape == (4,)
+    assert np.allclose(dft(np.ones(4)), [4, 0, 0])
+    assert np.isclose(dft(self.trace)[0], self.trace.sum())
+  def test_normalize(self):
+    assert np.allclose(normalize(-self.trace), -self.trace / 25)
+    assert np.allclose(normalize(self.trace, norm='l2'), 
+      self.trace / np.sqrt(np.sum(self.trace ** 2)))
+    # zero traces stay zero (no NaNs)
+    assert np.all(normalize(np.zeros((2, 6))) == 0)
+  @skipIf(find_spec('fullwavepy') is None, 'fullwavepy is not installed')
+  def test_same_as_fullwavepy(self):
+    from fullwavepy.numeric.generic import normalize as fw_normalize
+    from fullwavepy.numeric.operators import derivative as fw_derivative
+    from fullwavepy.numeric.fourier import dft as fw_dft
+    A = np.stack([self.trace, np.zeros(6), np.random.randn(6)])
+    for func, fw_func, kwargs in [(derivative, fw_derivative, dict(deriv=1)),
+      (dft, fw_dft, {}), (normalize, fw_normalize, dict(norm='max'))]:
+      # called trace by trace, as it used to be
+      old = np.apply_along_axis(fw_func, -1, A, **kwargs)
+      assert np.allclose(func(A, **kwargs), old)
+class TestModifierPipeline(TestCase):
+  def test_same_as_unfused(self):
+    A = np.random.randn(5,4,16)
+    kwargs = dict(norm_bulk=True, clip=0.5, deriv=2, norm='max')
+    B = np.clip(norm_bulk_max(A), -0.5, 0.5)
+    B = normalize(derivative(B, deriv=2))
+    assert np.allclose(ModifierPipeline(**kwargs)(A), B)
+  def test_small_blocks(self):
+    A = np.random.randn(5,4,16)
+    fused = ModifierPipeline(norm_bulk=True, clip_min=-0.1, block_size=7)(A)
+    assert np.allclose(fused, np.clip(A / np.max(np.abs(A)), -0.1, None))
+  def test_in_place(self):
+    A = np.random.randn(3,8)
+    B = modify_array(A, norm='max', deriv=1)
+    C = modify_array(A, norm='max', deriv=1, out=A)
+    assert C is A
+    assert np.allclose(A, B)
+  def test_spect_out(self):
+    A = np.random.randn(3,8)
+    out = np.empty((3,5))
+    assert modify_array(A, spect=True, out=out) is out
+    assert np.allclose(out, dft(A))
+  def test_dtype(self):
+    A = np.arange(6).reshape((2,3))
+    assert modify_array(A).dtype == A.dtype
+    assert modify_array(A, clip=1.5).dtype == np.float64
+    assert modify_array(A.astype(np.float32), norm='max').dtype == np.float32
+  def test_chunked(self):
+    A = np.random.randn(7,3,16)
+    kwargs = dict(norm_bulk=True, clip=0.5, deriv=1, spect=True, norm='l2')
+    B = modify_array(A, **kwargs)
+    C = modify_array(A, chunk_size=4, **kwargs)
+    assert np.allclose(B, C)
+  def test_chunked_memmap(self):
+    with TemporaryDirectory() as tmp:
+      fname = os.path.join(tmp, 'a.mmp')
+      A = np.random.randn(7,3,16)
+      B = modify_array(A, chunk_size=2, norm_bulk=True, out=fname)
+      assert isinstance(B, np.memmap)
+      assert np.allclose(B, A / np.max(np.abs(A)))
+      del B
+  def test_parallel(self):
+    A = np.random.randn(9,3,16)
+    kwargs = dict(norm_bulk=True, clip=0.5, deriv=1, spect=True, norm='max')
+    B = modify_array(A, **kwargs)
+    assert np.allclose(B, modify_array(A, n_workers=3, **kwargs))
+    assert np.allclose(B, modify_array(A, n_workers=2, executor='process', **kwargs))
+  def test_parallel_memmap(self):
+    with TemporaryDirectory() as tmp:
+      A = np.memmap(os.path.join(tmp, 'a.mmp'), dtype=np.float32, mode='w+', shape=(9,16))
+      A[:] = np.random.randn(9,16)
+      B = modify_array(A, norm='max')
+      C = modify_array(A, norm='max', n_workers=2, executor='process', chunk_size=2,
+        out=os.path.join(tmp, 'b.mmp'))
+      assert np.allclose(B, C)
+      del A, C
+class TestInterlace(TestCase):
+  def test_two(self):
+    A1 = np.zeros((5,2))
+    A2 = np.ones((5,2))
+    Z = interlace_arrays(A1, A2, chunk_size=2)
+    assert np.all(Z[:,0] == [0,0,1,1,0])
+  def test_legacy_call(self):
+    A1 = np.zeros((45,2))
+    A2 = np.ones((45,2))
+    Z = interlace_arrays(A1, A2, 10)
+    assert np.all(Z[:40,0] == np.repeat([0,1,0,1], 10))
+    assert np.all(Z[40:,0] == 0)
+  def test_many_3d(self):
+    A = [np.full((2,8,3), i) for i in range(3)]
+    out = np.empty((2,8,3))
+    Z = interlace_arrays(*A, chunk_size=2, axis=1, out=out)
+    assert Z is out
+    assert np.all(Z[1,:,2] == [0,0,1,1,2,2,0,0])
+  def test_shapes(self):
+    with self.assertRaises(ValueError):
+      interlace_arrays(np.zeros((2,2)), np.zeros((3,2)))
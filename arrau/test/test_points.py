@@ -0,0 +1,40 @@
+import numpy as np
+from unittest import TestCase
+from arrau.points import Points3d
+
+class TestPoints3d(TestCase):
+  def setUp(self):
+    self.xyz = np.array([[0,1,2],[3,4,5],[6,7,8],[9,10,11]], dtype=float)
+    self.pts = Points3d(self.xyz, kind=['src','rec','rec','rec'], id=[10,11,12,13])
+  def test_init(self):
+    assert self.pts.all.shape == (4,3)
+    assert np.all(self.pts.y == [1,4,7,10])
+    assert len(Points3d([(0,1,2)])) == 1
+    pts = Points3d({'S1': (0,1,2), 'R1': (3,4,5)})
+    assert list(pts.meta['name']) == ['S1', 'R1']
+    with self.assertRaises(AssertionError):
+      Points3d([(0,1)])
+  def test_slice(self):
+    assert np.all(self.pts.slice('y') == self.xyz[:, [0,2]])
+    assert np.all(self.pts.slice('x') == self.xyz[:, [1,2]])
+    assert np.all(self.pts.slice('z', value=5, tol=1) == [[3,4]])
+    with self.assertRaises(ValueError):
+      self.pts.slice('t')
+  def test_filter(self):
+    rec = self.pts.filter(kind='rec')
+    assert len(rec) == 3
+    assert list(rec.meta['id']) == [11,12,13]
+    assert len(self.pts.filter(box=[[0,5],[0,5],[0,5]])) == 2
+    assert len(self.pts.filter(id=[10,13], box=[[1,10],[0,20],[0,20]])) == 1
+    assert np.all(self.pts[1].all == [[3,4,5]])
+  def test_filter_no_column(self):
+    with self.assertRaises(ValueError):
+      self.pts.filter(name='S1')
+    with self.assertRaises(ValueError):
+      Points3d(self.xyz).filter(kind='rec')
+  def test_plot_slice(self):
+    from matplotlib.figure import Figure
+    ax = Figure().subplots()
+    line, = self.pts.plot_slice(ax, slice_at='z', annotate=True)
+    assert np.all(line.get_xdata() == self.xyz[:, 0])
+    assert len(ax.texts) == 4
@@ -0,0 +1,71 @@
+import os
+import numpy as np
+from tempfile import TemporaryDirectory
+from unittest import TestCase
+from arrau.generic import Arr
+from arrau.a3d import Arr3d
+from arrau.io import FileReader, read_any_format
+from arrau.segy import SegyFile, SegyWriter, IbmFloatArray, ibm2ieee, ieee2ibm, \
+  write_segy
+
+class TestIbm(TestCase):
+  def test_ibm2ieee(self):
+    raw = np.array([0x41100000, 0xC276A000, 0], dtype='>u4')
+    assert np.all(ibm2ieee(raw) == [1, -118.625, 0])
+  def test_ieee2ibm(self):
+    assert np.all(ieee2ibm([1, -118.625, 0]) == [0x41100000, 0xC276A000, 0])
+  def test_round_trip(self):
+    x = np.random.randn(1000).astype(np.float32) * 10.**np.random.randint(-5, 5, 1000)
+    assert np.allclose(ibm2ieee(ieee2ibm(x)), x, rtol=1e-6)
+
+class TestSegy(TestCase):
+  def setUp(self):
+    self.tmp = TemporaryDirectory()
+    self.fname = os.path.join(self.tmp.name, 'a.sgy')
+    self.A = np.random.randn(3,4,5).astype(np.float32)
+  def tearDown(self):
+    self.tmp.cleanup()
+  def test_ieee(self):
+    write_segy(self.A, self.fname, dt=2000)
+    f = SegyFile(self.fname)
+    assert f.ns == 5
+    assert f.dt == 2000
+    B = f.data(geometry=('inline', 'crossline'))
+    assert isinstance(B, np.memmap)
+    assert np.all(B == self.A)
+  def test_ibm(self):
+    write_segy(self.A, self.fname, sample_format=1)
+    B = SegyFile(self.fname).data(geometry=('inline', 'crossline'))
+    assert isinstance(B, IbmFloatArray)
+    assert B.shape == (3,4,5)
+    assert np.allclose(B[1], self.A[1])
+    assert np.allclose(np.asarray(B), self.A)
+  def test_select(self):
+    write_segy(self.A, self.fname)
+    f = SegyFile(self.fname)
+    assert np.all(f.select(inline=2) == [4,5,6,7])
+    assert np.all(f.read(inline=2, crossline=3) == self.A[1,2])
+    assert len(f.read(inline=10)) == 0
+  def test_streaming_writer(self):
+    with SegyWriter(self.fname, ns=5) as w:
+      w.write(np.zeros((2,5)), offset=[100, 200])
+      w.write(np.ones((1,5)), offset=300)
+    f = SegyFile(self.fname)
+    assert np.all(f.header('offset') == [100, 200, 300])
+    assert np.all(f.header('trace_sequence_file') == [1, 2, 3])
+    assert np.all(f.read(offset=300) == 1)
+  def test_read_any(self):
+    write_segy(self.A, self.fname)
+    B = read_any_format(self.fname, geometry=('inline', 'crossline'))
+    assert np.all(B == self.A)
+    # memory-mapped already, so not cached
+    B = FileReader.read_any(self.fname)
+    assert B.shape == (12,5)
+    assert not os.path.exists(os.path.join(self.tmp.name, 'a.mmp'))
+  def test_open_ibm(self):
+    write_segy(self.A, self.fname, sample_format=1)
+    a = Arr.open(self.fname, geometry=('inline', 'crossline'))
+    assert isinstance(a, Arr3d)
+    assert isinstance(a.arr, np.memmap)
+    assert np.allclose(a.arr, self.A)
+    del a
@@ -0,0 +1,37 @@
+"""
+Benchmark of the import time of the headless 
+core (arrau.generic): it must not import the
+plotting backend and must stay within a budget.
+
+Run as:
+>>> python benchmarks/bench_import.py [budget in s]
+"""
+import subprocess
+import sys
+
+CODE = """
+import sys, time
+import numpy
+t = time.perf_counter()
+import arrau.generic
+print(time.perf_counter() - t)
+print(' '.join(m for m in ['plotea', 'matplotlib'] if m in sys.modules))
+"""
+
+def bench(module='arrau.generic', budget=0.1, repeat=5):
+  times = []
+  for i in range(repeat):
+    out = subprocess.run([sys.executable, '-c', CODE.replace('arrau.generic', module)],
+      capture_output=True, text=True, check=True).stdout.split('\n')
+    times.append(float(out[0]))
+    imported = out[1].split()
+  t = min(times)
+  print('import {}: {:.3f} s (budget {:.3f} s, numpy excluded)'.format(module, t, budget))
+  if imported:
+    raise RuntimeError('import {} imports {}'.format(module, ', '.join(imported)))
+  if t > budget:
+    raise RuntimeError('import {} exceeds the budget'.format(module))
+  return t
+
+if __name__ == '__main__':
+  bench(budget=float(sys.argv[1]) if len(sys.argv) > 1 else 0.1)
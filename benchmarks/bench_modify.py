@@ -0,0 +1,24 @@
+"""
+Benchmark of tracewise modifiers: vectorised
+implementations vs. np.apply_along_axis loop.
+
+Run as:
+>>> python benchmarks/bench_modify.py
+"""
+import timeit
+import numpy as np
+from arrau.modify import derivative, dft, normalize
+
+def bench(shape=(341,361,81), repeat=3):
+  A = np.random.rand(*shape).astype(np.float32)
+  print('array shape: {}'.format(shape))
+  for func in [derivative, dft, normalize]:
+    t_loop = min(timeit.repeat(lambda: np.apply_along_axis(func, -1, A), 
+      number=1, repeat=repeat))
+    t_vect = min(timeit.repeat(lambda: func(A, axis=-1), 
+      number=1, repeat=repeat))
+    print('{:>10}: loop {:.3f} s, vectorised {:.3f} s, speedup x{:.0f}'.format(\
+      func.__name__, t_loop, t_vect, t_loop / t_vect))
+
+if __name__ == '__main__':
+  bench()
@@ -0,0 +1,30 @@
+"""
+Scaling of parallel modify_array with the number 
+of workers, for threads and processes.
+
+Run as:
+>>> python benchmarks/bench_parallel.py
+"""
+import os
+import timeit
+import numpy as np
+from arrau.modify import modify_array
+
+def bench(shape=(341,361,81), repeat=3, **kwargs):
+  kwargs = kwargs or dict(deriv=1, spect=True, norm='max')
+  A = np.random.rand(*shape).astype(np.float32)
+  print('array shape: {}, modifiers: {}'.format(shape, kwargs))
+  t1 = min(timeit.repeat(lambda: modify_array(A, **kwargs), 
+    number=1, repeat=repeat))
+  print('{:>8} {:>2} workers: {:.3f} s'.format('serial', 1, t1))
+  n = 1
+  while n <= os.cpu_count():
+    for executor in ['thread', 'process']:
+      t = min(timeit.repeat(lambda: modify_array(A, n_workers=n, 
+        executor=executor, **kwargs), number=1, repeat=repeat))
+      print('{:>8} {:>2} workers: {:.3f} s, speedup x{:.1f}'.format(\
+        executor, n, t, t1 / t))
+    n *= 2
+
+if __name__ == '__main__':
+  bench()
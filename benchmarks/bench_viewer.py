@@ -0,0 +1,38 @@
+"""
+Benchmark of redraw latency of Arr3dViewer
+when scrubbing through a 341x361x81 model,
+with and without blitting (Agg canvas).
+
+Run as:
+>>> python benchmarks/bench_viewer.py [target in s]
+"""
+import sys
+import time
+import numpy as np
+from matplotlib.figure import Figure
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from arrau.a3d import Arr3d
+
+def bench(shape=(341,361,81), target=0.05, nsteps=40):
+  a = Arr3d(np.random.rand(*shape).astype(np.float32))
+  print('array shape: {}'.format(shape))
+  latency = {}
+  for blit in [False, True]:
+    fig = Figure(figsize=(15, 4))
+    FigureCanvasAgg(fig)
+    v = a.viewer(fig=fig, blit=blit)
+    times = []
+    for i in range(nsteps):
+      t = time.perf_counter()
+      v.update(x=i * (shape[0] - 1) // nsteps, y=shape[1] - 1 - i, z=i % shape[2])
+      if not blit:
+        fig.canvas.draw() # draw_idle is a no-op without an event loop
+      times.append(time.perf_counter() - t)
+    latency[blit] = np.median(times)
+    print('blit={}: median redraw {:.1f} ms'.format(blit, 1e3 * latency[blit]))
+  if latency[True] > target:
+    raise RuntimeError('Redraw latency exceeds the target of {:.0f} ms'.format(1e3 * target))
+  return latency
+
+if __name__ == '__main__':
+  bench(target=float(sys.argv[1]) if len(sys.argv) > 1 else 0.05)